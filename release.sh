@@ -39,6 +39,18 @@ command -v gh >/dev/null 2>&1 || { echo -e "${RED}GitHub CLI (gh) не найд
 echo -e "${GREEN}>>> Шаг 1: Очистка старых сборок...${NC}"
 rm -rf dist build *.dmg
 
+echo -e "${GREEN}>>> Шаг 1.5: Загрузка моделей детекторов лиц...${NC}"
+# Модели не хранятся в репозитории; PyInstaller упаковывает их из assets/.
+OPENCV_RAW="https://raw.githubusercontent.com/opencv/opencv/4.x"
+fetch_model() {
+    [ -f "$1" ] && return 0
+    curl -fL --create-dirs -o "$1" "$2" || { echo -e "${RED}Не удалось загрузить $1! Прерывание.${NC}"; rm -f "$1"; exit 1; }
+}
+fetch_model assets/haarcascade_frontalface_default.xml "$OPENCV_RAW/data/haarcascades/haarcascade_frontalface_default.xml"
+fetch_model assets/lbpcascade_frontalface_improved.xml "$OPENCV_RAW/data/lbpcascades/lbpcascade_frontalface_improved.xml"
+fetch_model assets/models/deploy.prototxt "$OPENCV_RAW/samples/dnn/face_detector/deploy.prototxt"
+fetch_model assets/models/res10_300x300_ssd_iter_140000.caffemodel "https://raw.githubusercontent.com/opencv/opencv_3rdparty/dnn_samples_face_detector_20170830/res10_300x300_ssd_iter_140000.caffemodel"
+
 echo -e "${GREEN}>>> Шаг 2: Сборка приложения с помощью PyInstaller...${NC}"
 pyinstaller --noconfirm "$SPEC_FILE"
 if [ $? -ne 0 ]; then
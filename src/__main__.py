@@ -1,22 +1,85 @@
 # This file allows the package to be run as a script
 # python -m src
 
+import argparse
 import sys
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtGui import QIcon
-from .main_window import MainWindow
+from .startup_profiler import profiler
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m src")
+    parser.add_argument(
+        "--record", metavar="FILE", help="record the camera session to FILE"
+    )
+    parser.add_argument(
+        "--replay", metavar="FILE", help="use a recorded session instead of a camera"
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        help="replay speed multiplier, 0 for unthrottled (default: 1.0)",
+    )
+    parser.add_argument(
+        "--replay-loop", action="store_true", help="restart the replay when it ends"
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print the time spent in imports and service constructors",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="serve pipeline metrics on http://127.0.0.1:PORT/metrics (and /metrics.json)",
+    )
+    # Unknown arguments are left for Qt (e.g. -platform, -style).
+    return parser.parse_known_args(argv)
 
 
 def main():
-    app = QApplication(sys.argv)
-    app.setOrganizationName("SergTheEngineer")
-    app.setApplicationName("PostureAssistant")
+    args, qt_args = parse_args(sys.argv[1:])
+    if args.profile_startup:
+        profiler.enable()
+    with profiler.stage("import PyQt6"):
+        from PyQt6.QtCore import QTimer
+        from PyQt6.QtGui import QIcon
+        from PyQt6.QtWidgets import QApplication
+    with profiler.stage("import services (OpenCV, numpy)"):
+        from .main_window import MainWindow
+        from .frame_source import ReplaySource
+        from .utils import ORGANIZATION_NAME, APPLICATION_NAME, resource_path
+
+    with profiler.stage("QApplication"):
+        app = QApplication(sys.argv[:1] + qt_args)
+    app.setOrganizationName(ORGANIZATION_NAME)
+    app.setApplicationName(APPLICATION_NAME)
     app.setQuitOnLastWindowClosed(False)
-    app.setWindowIcon(QIcon("assets/vibestand.png"))
     app.setApplicationVersion("1.0.0")
     try:
-        window = MainWindow()
-        window.show()
+        if args.metrics_port is not None:
+            from .metrics import MetricsServer
+
+            MetricsServer(args.metrics_port).start()
+        frame_source = None
+        if args.replay:
+            frame_source = ReplaySource(
+                args.replay, speed=args.replay_speed, loop=args.replay_loop
+            )
+        with profiler.stage("MainWindow"):
+            window = MainWindow(frame_source=frame_source, record_path=args.record)
+        with profiler.stage("First show"):
+            window.show()
+
+        def set_window_icon():
+            # The large window icon is decoded once the event loop runs,
+            # after the window and the tray icon are up.
+            with profiler.stage("Window icon"):
+                app.setWindowIcon(QIcon(resource_path("assets/vibestand.png")))
+            profiler.report("window icon")
+
+        QTimer.singleShot(0, set_window_icon)
         sys.exit(app.exec())
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,285 @@
+# Micro-benchmarks of the processing hot path with regression thresholds.
+# python -m src.benchmark --baseline bench.json --update-baseline   (record)
+# python -m src.benchmark --baseline bench.json                     (compare)
+#
+# Each stage of ProcessingService._analyze, and the whole of it, runs on
+# the same frame at 480p, 720p, 1080p and 4K. Latency percentiles and the
+# peak memory allocated per call (tracemalloc) are reported. With a
+# baseline, the exit status is 1 when a stage got slower or allocates more
+# than the tolerance allows. Baselines are only meaningful on the machine
+# that recorded them.
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from PyQt6.QtCore import QCoreApplication
+from .face_detectors import create_detector
+from .frame_ring import FrameRing
+from .frame_source import ReplaySource
+from .overlay_compositor import OverlayCompositor
+from .processing_service import ProcessingService
+from .settings_service import SettingsService
+
+RESOLUTIONS = {
+    "480p": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+STAGES = (
+    "flip",
+    "copy",
+    "resize",
+    "cvtColor",
+    "detect",
+    "preview",
+    "overlay",
+    "classify",
+    "analyze",
+)
+PREVIEW_SIZE = (800, 600)
+# Differences below this are timer noise, whatever the tolerance.
+MIN_REGRESSION_MS = 0.05
+MIN_REGRESSION_BYTES = 4096
+
+
+def synthetic_frame(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """A noisy gradient with a bright face-sized ellipse, the same on every run."""
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(40, 200, width, dtype=np.float32)
+    frame = np.repeat(gradient[None, :, None], height, axis=0).repeat(3, axis=2)
+    frame += rng.normal(0, 12, frame.shape).astype(np.float32)
+    frame = np.clip(frame, 0, 255).astype(np.uint8)
+    center = (width // 2, height * 2 // 5)
+    axes = (width // 10, height // 6)
+    cv2.ellipse(frame, center, axes, 0, 0, 360, (170, 190, 220), -1)
+    return frame
+
+
+def recording_frame(path: str, width: int, height: int) -> np.ndarray:
+    """The first frame of a recording, resized to the benchmark resolution."""
+    source = ReplaySource(path, speed=0)
+    if not source.open():
+        raise IOError(f"Could not open {path}")
+    try:
+        ret, frame = source.read()
+    finally:
+        source.release()
+    if not ret:
+        raise IOError(f"{path} has no frames")
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def make_stages(frame: np.ndarray, processing: ProcessingService, detector) -> dict:
+    """Stage name -> callable running that stage once on `frame`."""
+    h, w = frame.shape[:2]
+    analysis_width = processing.governor.analysis_width
+    analysis_size = (analysis_width, int(h * analysis_width / w))
+    buffer = np.empty_like(frame)
+    small = np.empty((analysis_size[1], analysis_size[0], 3), dtype=np.uint8)
+    gray = np.empty(small.shape[:2], dtype=np.uint8)
+    cv2.resize(frame, analysis_size, dst=small, interpolation=cv2.INTER_AREA)
+
+    processing.set_preview_size(*PREVIEW_SIZE)
+    scale = processing._preview_scale(frame)
+    pixels = processing._render_preview(frame, scale)
+    compositor = OverlayCompositor()
+    calibration = processing.settings.snapshot.calibration
+    faces = detector.detect(small)
+    if len(faces):
+        face = tuple(int(v * w / analysis_width) for v in faces[0])
+    else:
+        face = (w // 3, h // 4, w // 5, h // 3)
+
+    def classify():
+        processing.state_machine.update(processing._classify(face), time.monotonic())
+
+    return {
+        "flip": lambda: cv2.flip(frame, 1, dst=buffer),
+        "copy": lambda: np.copyto(buffer, frame),
+        "resize": lambda: cv2.resize(
+            frame, analysis_size, dst=small, interpolation=cv2.INTER_AREA
+        ),
+        "cvtColor": lambda: cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=gray),
+        "detect": lambda: detector.detect(small),
+        "preview": lambda: processing._render_preview(frame, scale),
+        "overlay": lambda: compositor.compose(
+            pixels, scale, calibration, face, (0, 255, 0)
+        ),
+        "classify": classify,
+        "analyze": lambda: processing._analyze(frame),
+    }
+
+
+def measure(func, iterations: int, warmup: int = 3, alloc_iterations: int = 5) -> dict:
+    for _ in range(warmup):
+        func()
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples[i] = time.perf_counter() - started
+
+    # Separate pass: tracemalloc slows every allocation down.
+    tracemalloc.start()
+    peak = 0
+    try:
+        for _ in range(alloc_iterations):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            func()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    p50, p95 = np.percentile(samples, (50, 95)) * 1000
+    return {
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "mean_ms": float(samples.mean() * 1000),
+        "peak_alloc_bytes": int(peak),
+    }
+
+
+def run(resolutions, stages, iterations, recording=None) -> dict:
+    # Benchmarks never read or write the user's settings file.
+    settings = SettingsService(persistent=False)
+    # Worst case and repeatable: no motion gating, no adaptive degradation.
+    settings.update({"motion_gate_enabled": False, "cpu_governor_enabled": False})
+    settings.set_calibration_data(200, 50)
+    detector = create_detector(
+        settings.snapshot.face_detector,
+        scale_factor=settings.snapshot.face_detector_scale_factor,
+        min_neighbors=settings.snapshot.face_detector_min_neighbors,
+    )
+
+    results = {}
+    for name in resolutions:
+        width, height = RESOLUTIONS[name]
+        frame = (
+            recording_frame(recording, width, height)
+            if recording
+            else synthetic_frame(width, height)
+        )
+        processing = ProcessingService(settings, FrameRing())
+        funcs = make_stages(frame, processing, detector)
+        for stage in stages:
+            results[f"{name}/{stage}"] = measure(funcs[stage], iterations)
+            print(_format_row(f"{name}/{stage}", results[f"{name}/{stage}"]))
+    return results
+
+
+def _format_row(key: str, result: dict) -> str:
+    return (
+        f"{key:<16} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} "
+        f"{result['mean_ms']:>9.3f} {result['peak_alloc_bytes'] / 1024:>10.1f}"
+    )
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Returns a description of every result that regressed past the baseline."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        slower = result["p50_ms"] - base["p50_ms"]
+        limit = base["p50_ms"] * (1 + tolerance)
+        if slower > MIN_REGRESSION_MS and result["p50_ms"] > limit:
+            regressions.append(
+                f"{key}: p50 {result['p50_ms']:.3f} ms vs {base['p50_ms']:.3f} ms"
+            )
+        grown = result["peak_alloc_bytes"] - base["peak_alloc_bytes"]
+        limit = base["peak_alloc_bytes"] * (1 + tolerance)
+        if grown > MIN_REGRESSION_BYTES and result["peak_alloc_bytes"] > limit:
+            regressions.append(
+                f"{key}: allocates {result['peak_alloc_bytes']} bytes "
+                f"vs {base['peak_alloc_bytes']}"
+            )
+    return regressions
+
+
+def _environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cv2_threads": cv2.getNumThreads(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m src.benchmark")
+    parser.add_argument(
+        "--resolutions",
+        nargs="+",
+        choices=list(RESOLUTIONS),
+        default=list(RESOLUTIONS),
+    )
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument(
+        "--iterations", type=int, default=50, help="timed runs per stage (default: 50)"
+    )
+    parser.add_argument(
+        "--recording", help="take the frame from a recording instead of a synthetic one"
+    )
+    parser.add_argument(
+        "--baseline", help="JSON file with the results to compare against"
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write the results to --baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown or allocation growth as a fraction (default: 0.25)",
+    )
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline needs --baseline")
+
+    app = QCoreApplication(sys.argv[:1])  # ProcessingService owns a QTimer
+    print(f"{'stage':<16} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9} {'alloc KB':>10}")
+    try:
+        results = run(args.resolutions, args.stages, args.iterations, args.recording)
+    except (IOError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    report = {"environment": _environment(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if not args.baseline:
+        return
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != report["environment"]:
+        print("WARNING: the baseline was recorded in a different environment.")
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
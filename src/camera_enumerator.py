@@ -0,0 +1,90 @@
+import os
+import sys
+import threading
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal, pyqtSlot
+from .camera_service import CameraService, VIDEO4LINUX_PATH
+
+
+class CameraEnumerator(QObject):
+    """
+    Keeps the list of available cameras without blocking the GUI thread.
+
+    The list found by the previous run is stored in the settings and is
+    available immediately through `cameras`. refresh() enumerates again on
+    a worker thread (the generic fallback opens devices one by one, which
+    can take seconds) and emits `cameras_changed` when it finishes.
+
+    On Linux the video4linux device directories are watched, so plugging
+    or unplugging a camera updates the list by re-reading the directory,
+    without probing any device.
+    """
+
+    cameras_changed = pyqtSignal(list)
+    _enumerated = pyqtSignal(list)
+
+    SETTINGS_KEY = "camera_list"
+    # udev creates the device nodes in several steps; wait for them to settle.
+    HOTPLUG_DELAY_MS = 500
+
+    def __init__(self, settings_service, parent=None):
+        super().__init__(parent)
+        self.settings = settings_service
+        self.cameras = self.settings.get(self.SETTINGS_KEY, [])
+        self._thread = None
+        self._enumerated.connect(self._on_enumerated)
+
+        self._watcher = None
+        if sys.platform.startswith("linux"):
+            self._hotplug_timer = QTimer(self)
+            self._hotplug_timer.setSingleShot(True)
+            self._hotplug_timer.timeout.connect(self._rescan_video4linux)
+            # sysfs does not report every change through inotify, so the
+            # device nodes in /dev are watched as well.
+            paths = [p for p in (VIDEO4LINUX_PATH, "/dev") if os.path.isdir(p)]
+            if paths:
+                self._watcher = QFileSystemWatcher(paths, self)
+                self._watcher.directoryChanged.connect(self._on_directory_changed)
+
+    @property
+    def is_refreshing(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def refresh(self):
+        """Enumerates the cameras on a worker thread."""
+        if self.is_refreshing:
+            return
+        self._thread = threading.Thread(
+            target=self._enumerate, name="CameraEnumerator", daemon=True
+        )
+        self._thread.start()
+
+    def _enumerate(self):
+        # Emitted from the worker thread; delivered on the enumerator's thread.
+        self._enumerated.emit(CameraService.list_available_cameras())
+
+    @pyqtSlot(list)
+    def _on_enumerated(self, cameras: list):
+        self._thread = None
+        self._store(cameras)
+        self.cameras_changed.emit(cameras)
+
+    @pyqtSlot(str)
+    def _on_directory_changed(self, path: str):
+        self._hotplug_timer.start(self.HOTPLUG_DELAY_MS)
+
+    def _rescan_video4linux(self):
+        try:
+            cameras = CameraService.list_video4linux_cameras()
+        except FileNotFoundError:
+            cameras = []  # The last video device was removed.
+        except OSError as e:
+            print(f"ERROR: Could not list video devices: {e}")
+            return
+        if cameras != self.cameras:
+            self._store(cameras)
+            self.cameras_changed.emit(cameras)
+
+    def _store(self, cameras: list):
+        self.cameras = cameras
+        if cameras != self.settings.get(self.SETTINGS_KEY, []):
+            self.settings.set(self.SETTINGS_KEY, cameras)
@@ -1,47 +1,120 @@
 import cv2
-import numpy as np
 import os
 import sys
 from PyQt6.QtCore import QThread, pyqtSignal, pyqtSlot
+from .frame_ring import FrameRing
+from .frame_source import FrameSource, VideoCaptureSource, RecordingSource
+from .metrics import metrics
+
+
+CAPTURE_CONTINUOUS = "continuous"
+CAPTURE_ON_DEMAND = "demand"
+VIDEO4LINUX_PATH = "/sys/class/video4linux"
 
 
 class CameraService(QThread):
-    frame_ready = pyqtSignal(np.ndarray)
+    frame_ready = pyqtSignal(int)  # sequence number of the frame in frame_ring
     camera_started = pyqtSignal(bool)
 
-    def __init__(self, camera_id=0, parent=None):
+    def __init__(
+        self,
+        camera_id=0,
+        frame_source=None,
+        record_path=None,
+        capture_mode=CAPTURE_ON_DEMAND,
+        parent=None,
+    ):
         super().__init__(parent)
         self.camera_id = camera_id
-        self.cap = None
+        # CAPTURE_ON_DEMAND keeps grabbing to drain the driver queue but only
+        # decodes a frame when one was requested through frame_ring.
+        self.capture_mode = capture_mode
+        # An explicit FrameSource (e.g. a ReplaySource) replaces the webcam.
+        self.frame_source = frame_source
+        # When set, every captured frame is also written to this recording.
+        self.record_path = record_path
+        self.source = None
+        # Captured frames are written in place into this shared ring.
+        self.frame_ring = FrameRing()
+        self._capture_buffer = None
         self._is_running = False
         self._is_ui_visible = True  # Assume UI is visible on start
 
-    def run(self):
-        if self.cap is None:
-            self.cap = cv2.VideoCapture(self.camera_id)
-        if not self.cap.isOpened():
-            self.cap.open(self.camera_id)
+    def _create_source(self) -> FrameSource:
+        source = self.frame_source
+        if source is None:
+            source = VideoCaptureSource(self.camera_id)
+        if self.record_path:
+            source = RecordingSource(source, self.record_path)
+        return source
 
-        if not self.cap.isOpened():
+    def run(self):
+        self.source = self._create_source()
+        if not self.source.open():
             self.camera_started.emit(False)
-            if self.cap:
-                self.cap.release()
-                self.cap = None
+            self.source.release()
+            self.source = None
             return
 
+        # Recordings need every frame, so they always decode continuously.
+        on_demand = self.capture_mode == CAPTURE_ON_DEMAND and not self.record_path
+
         self._is_running = True
         self.camera_started.emit(True)
-        while self._is_running:
-            ret, frame = self.cap.read()
-            if ret:
-                self.frame_ready.emit(cv2.flip(frame, 1))
-
-            sleep_duration = 25 if self._is_ui_visible else 1500
-            self.msleep(sleep_duration)  # Dynamic FPS
-
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        while self._is_running and self.source.is_opened():
+            if on_demand and not self.source.realtime:
+                if self.frame_ring.take_request():
+                    with metrics.time("capture_read"):
+                        ret, frame = self.source.read(self._capture_buffer)
+                    if ret:
+                        self._publish(frame)
+                    else:
+                        metrics.increment("capture_failures")
+                        self.frame_ring.request_frame()  # Retry on the next grab
+                else:
+                    self.msleep(1)
+            elif on_demand:
+                with metrics.time("capture_grab"):
+                    grabbed = self.source.grab()
+                if grabbed and self.frame_ring.take_request():
+                    with metrics.time("capture_retrieve"):
+                        ret, frame = self.source.retrieve(self._capture_buffer)
+                    if ret:
+                        self._publish(frame)
+                    else:
+                        metrics.increment("capture_failures")
+                        self.frame_ring.request_frame()  # Retry on the next grab
+            else:
+                with metrics.time("capture_read"):
+                    ret, frame = self.source.read(self._capture_buffer)
+                if ret:
+                    self._publish(frame)
+                else:
+                    metrics.increment("capture_failures")
+
+            if not self.source.paced:
+                # Grabbing without decoding is cheap, and a slow grab rate
+                # would delay requested frames, so only continuous mode
+                # throttles when the UI is hidden.
+                sleep_duration = 25 if self._is_ui_visible or on_demand else 1500
+                self.msleep(sleep_duration)  # Dynamic FPS
+
+        if self.source:
+            self.source.release()
+            self.source = None
+
+    def _publish(self, frame):
+        # Sources decode into the buffer passed back in, so steady-state
+        # capture reuses the same memory instead of allocating per frame.
+        self._capture_buffer = frame
+        with metrics.time("capture_publish"):
+            index, slot = self.frame_ring.acquire_write(frame.shape, frame.dtype)
+            cv2.flip(frame, 1, dst=slot)
+            seq = self.frame_ring.commit(index, self.source.timestamp)
+        metrics.increment("frames_captured")
+        metrics.mark("capture_fps")
+        metrics.stamp("frame_delivery")
+        self.frame_ready.emit(seq)
 
     def stop(self):
         self._is_running = False
@@ -52,6 +125,21 @@ class CameraService(QThread):
         """Slot to update FPS based on UI visibility."""
         self._is_ui_visible = is_visible
 
+    @staticmethod
+    def list_video4linux_cameras() -> list[dict]:
+        """
+        Lists /sys/class/video4linux without opening any device. Generally
+        reliable on Linux but may list non-camera devices.
+        """
+        video_devices = [
+            dev for dev in os.listdir(VIDEO4LINUX_PATH) if dev.startswith("video")
+        ]
+        cameras = []
+        for dev_name in sorted(video_devices, key=lambda d: int(d[len("video"):])):
+            index = int(dev_name[len("video"):])
+            cameras.append({"id": index, "name": f"Camera {index}"})
+        return cameras
+
     @staticmethod
     def list_available_cameras(limit=10) -> list[dict]:
         """
@@ -82,17 +170,7 @@ class CameraService(QThread):
                     )
 
             elif sys.platform.startswith("linux"):
-                # This method is generally reliable on Linux but may list non-camera devices.
-                video_devices = [
-                    dev
-                    for dev in os.listdir("/sys/class/video4linux")
-                    if dev.startswith("video")
-                ]
-                for dev_name in sorted(video_devices):
-                    index = int(dev_name.replace("video", ""))
-                    platform_specific_cameras.append(
-                        {"id": index, "name": f"Camera {index}"}
-                    )
+                platform_specific_cameras = CameraService.list_video4linux_cameras()
 
             # If the platform-specific method found any cameras, return them.
             if platform_specific_cameras:
@@ -0,0 +1,120 @@
+import threading
+import time
+import cv2
+
+
+class CpuGovernor:
+    """
+    Keeps the process under a CPU budget by trading analysis quality for cost.
+
+    Process CPU time is sampled every `window_seconds` and expressed as a
+    percentage of one core. Above the target the governor steps down one knob
+    per window: first OpenCV's thread pool is limited to one thread, then the
+    analysis interval is stretched or the analysis resolution lowered
+    (resolution first when detection dominates the measured per-analysis
+    cost). Well below the target the same steps are undone in reverse order.
+
+    One governor may be shared by the ProcessingServices of several cameras,
+    on different threads, so that they share one budget.
+    """
+
+    WIDTHS = (320, 256, 224, 192, 160)
+    MAX_INTERVAL_SCALE = 8.0
+    INTERVAL_STEP = 1.5
+    # Relax only when usage drops below this fraction of the target, so the
+    # governor does not oscillate around it.
+    RELAX_FRACTION = 0.6
+
+    def __init__(self, target_percent=10.0, window_seconds=5.0, enabled=True):
+        self.target_percent = target_percent
+        self.window_seconds = window_seconds
+        self.enabled = enabled
+        self.max_threads = max(1, cv2.getNumThreads())
+        self.num_threads = self.max_threads
+        self.interval_scale = 1.0
+        self.width_index = 0
+        self.cpu_percent = 0.0
+        self.stage_costs = {}
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._cpu_start = time.process_time()
+
+    @property
+    def analysis_width(self) -> int:
+        return self.WIDTHS[self.width_index]
+
+    def record_stage(self, stage: str, seconds: float):
+        """Adds a stage duration to its exponential moving average."""
+        with self._lock:
+            previous = self.stage_costs.get(stage)
+            self.stage_costs[stage] = (
+                seconds if previous is None else previous * 0.8 + seconds * 0.2
+            )
+
+    def reset(self):
+        """Returns every knob to full quality."""
+        with self._lock:
+            self._set_threads(self.max_threads)
+            self.interval_scale = 1.0
+            self.width_index = 0
+
+    def update(self, now: float = None) -> bool:
+        """Re-evaluates the budget once per window. Returns True if a knob moved."""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            return self._update(now)
+
+    def _update(self, now: float) -> bool:
+        elapsed = now - self._window_start
+        if elapsed <= 0 or elapsed < self.window_seconds:
+            return False
+        cpu = time.process_time()
+        self.cpu_percent = 100.0 * (cpu - self._cpu_start) / elapsed
+        self._window_start = now
+        self._cpu_start = cpu
+        if not self.enabled:
+            return False
+
+        if self.cpu_percent > self.target_percent:
+            return self._degrade()
+        if self.cpu_percent < self.target_percent * self.RELAX_FRACTION:
+            return self._relax()
+        return False
+
+    def _detection_dominates(self) -> bool:
+        total = sum(self.stage_costs.values())
+        return total > 0 and self.stage_costs.get("detect", 0) / total > 0.5
+
+    def _degrade(self) -> bool:
+        if self.num_threads > 1:
+            self._set_threads(1)
+            return True
+        can_shrink = self.width_index < len(self.WIDTHS) - 1
+        can_stretch = self.interval_scale < self.MAX_INTERVAL_SCALE
+        if can_shrink and (self._detection_dominates() or not can_stretch):
+            self.width_index += 1
+            return True
+        if can_stretch:
+            self.interval_scale = min(
+                self.MAX_INTERVAL_SCALE, self.interval_scale * self.INTERVAL_STEP
+            )
+            return True
+        return False
+
+    def _relax(self) -> bool:
+        if self.width_index > 0:
+            self.width_index -= 1
+            return True
+        if self.interval_scale > 1.0:
+            self.interval_scale = max(1.0, self.interval_scale / self.INTERVAL_STEP)
+            return True
+        if self.num_threads < self.max_threads:
+            self._set_threads(self.max_threads)
+            return True
+        return False
+
+    def _set_threads(self, count: int):
+        if count != self.num_threads:
+            cv2.setNumThreads(count)
+            self.num_threads = count
@@ -0,0 +1,141 @@
+# Headless monitoring: camera -> processing -> statistics under a
+# QCoreApplication, with no widgets, tray icon or video preview. Uses the
+# same settings (calibration) and statistics database as the desktop app.
+# python -m src.daemon --camera 0
+# python -m src.daemon --replay session.pasrec --duration 60
+
+import argparse
+import signal
+import sys
+from PyQt6.QtCore import QCoreApplication, QObject, QTimer, pyqtSignal
+from .frame_source import ReplaySource
+from .monitoring_pipeline import MonitoringPipeline
+from .posture_status import PostureStatus
+from .utils import ORGANIZATION_NAME, APPLICATION_NAME
+
+
+class PostureDaemon(QObject):
+    visibility_changed = pyqtSignal(bool)
+
+    def __init__(self, args, parent=None):
+        super().__init__(parent)
+        self.args = args
+        frame_source = None
+        if args.replay:
+            frame_source = ReplaySource(
+                args.replay, speed=args.replay_speed, loop=args.replay_loop
+            )
+        self.pipeline = MonitoringPipeline(
+            frame_source=frame_source, camera_id=args.camera, parent=self
+        )
+        self.camera_service = self.pipeline.camera_service
+
+        # Nothing is displayed: analyse at the tray-only cadence, no preview.
+        self.visibility_changed.connect(self.pipeline.visibility_changed)
+        self.camera_service.camera_started.connect(self._on_camera_started)
+        self.camera_service.finished.connect(self._on_camera_finished)
+        self.pipeline.status_updated.connect(self._on_status)
+        self._last_printed = None
+        self._stopping = False
+
+    def start(self):
+        self.pipeline.start()
+        self.visibility_changed.emit(False)
+        self.pipeline.start_cameras()
+        # After start_cameras(), which creates the additional cameras'
+        # processing services, so that every camera is calibrated.
+        if self.args.calibrate:
+            self.pipeline.calibration_requested.emit()
+        elif self._calibration().reference_y is None:
+            print("INFO: Not calibrated yet; run with --calibrate while sitting straight.")
+        if self.args.duration:
+            QTimer.singleShot(int(self.args.duration * 1000), self.stop)
+
+    def _calibration(self):
+        snapshot = self.pipeline.settings_service.snapshot
+        if self.args.camera is None:
+            return snapshot.calibration
+        return snapshot.calibration_for(self.args.camera)
+
+    def _on_camera_started(self, success: bool):
+        if success:
+            print("INFO: Monitoring started.")
+        else:
+            print("ERROR: Could not open the camera.", file=sys.stderr)
+            self.stop()
+
+    def _on_camera_finished(self):
+        # A replay without --replay-loop ends on its own.
+        if not self._stopping:
+            QTimer.singleShot(0, self.stop)
+
+    def _on_status(self, status: PostureStatus):
+        # Heartbeats repeat the current status; print changes only.
+        if self.args.verbose and status != self._last_printed:
+            self._last_printed = status
+            print(f"INFO: Posture {status.name}")
+
+    def stop(self):
+        if self._stopping:
+            return
+        self._stopping = True
+        self.pipeline.shutdown()
+        print("INFO: Monitoring stopped.")
+        QCoreApplication.instance().quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m src.daemon")
+    parser.add_argument("--camera", type=int, help="camera id (default: from settings)")
+    parser.add_argument(
+        "--replay", metavar="FILE", help="use a recorded session instead of a camera"
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        help="replay speed multiplier (default: 1.0)",
+    )
+    parser.add_argument(
+        "--replay-loop", action="store_true", help="restart the replay when it ends"
+    )
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument(
+        "--calibrate",
+        action="store_true",
+        help="take the first face each camera sees as the correct posture",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="serve pipeline metrics on http://127.0.0.1:PORT/metrics",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="print every posture change"
+    )
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv[:1])
+    app.setOrganizationName(ORGANIZATION_NAME)
+    app.setApplicationName(APPLICATION_NAME)
+    if args.metrics_port is not None:
+        from .metrics import MetricsServer
+
+        MetricsServer(args.metrics_port).start()
+
+    daemon = PostureDaemon(args)
+    # Python only runs signal handlers between bytecodes, so wake up
+    # periodically while Qt's event loop is idle.
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: daemon.stop())
+    wakeup = QTimer()
+    wakeup.timeout.connect(lambda: None)
+    wakeup.start(500)
+
+    QTimer.singleShot(0, daemon.start)
+    sys.exit(app.exec())
+
+
+if __name__ == "__main__":
+    main()
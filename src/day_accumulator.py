@@ -0,0 +1,48 @@
+from datetime import date, datetime, timedelta
+
+
+def _midnight(day: date) -> float:
+    return datetime.combine(day, datetime.min.time()).timestamp()
+
+
+class DayAccumulator:
+    """
+    Running seconds per state for the current local day.
+
+    Closed intervals are added with add(); only the part that falls inside
+    the current day counts. An interval or a query past midnight starts a
+    new day from zero, keeping the part of the interval after midnight.
+    """
+
+    def __init__(self, day: date, totals: dict = None):
+        self._start_day(day)
+        self.totals.update(totals or {})
+
+    def _start_day(self, day: date):
+        self.day = day
+        self.start = _midnight(day)
+        self.end = _midnight(day + timedelta(days=1))
+        self.totals = {}
+
+    def _roll_over(self, now: float):
+        if now >= self.end:
+            self._start_day(date.fromtimestamp(now))
+
+    def _overlap(self, start: float, end: float) -> float:
+        return max(0.0, min(end, self.end) - max(start, self.start))
+
+    def add(self, state: str, start: float, end: float):
+        self._roll_over(end)
+        seconds = self._overlap(start, end)
+        if seconds > 0:
+            self.totals[state] = self.totals.get(state, 0) + seconds
+
+    def snapshot(self, now: float, open_state: str = None, open_since: float = None) -> dict:
+        """Totals as of `now`, counting the still-open interval of `open_state`."""
+        self._roll_over(now)
+        totals = dict(self.totals)
+        if open_state is not None:
+            seconds = self._overlap(open_since, now)
+            if seconds > 0:
+                totals[open_state] = totals.get(open_state, 0) + seconds
+        return totals
@@ -0,0 +1,147 @@
+# Runs several face-detector backends on the same frames and compares
+# their speed and agreement.
+# python -m src.detector_compare session.pasrec --backends haar lbp dnn
+
+import argparse
+import sys
+import cv2
+from .face_detectors import DETECTOR_BACKENDS, available_backends, create_detector
+from .frame_source import ReplaySource, VideoCaptureSource
+
+
+def _largest(faces):
+    if len(faces) == 0:
+        return None
+    return tuple(int(v) for v in max(faces, key=lambda f: f[2] * f[3]))
+
+
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class BackendStats:
+    def __init__(self, detector):
+        self.detector = detector
+        self.latencies = []
+        self.detections = 0
+        self.agreements = 0
+        self.ious = []
+
+
+def compare(source, backends, analysis_width=320, max_frames=None):
+    """
+    Feeds frames from `source` to every backend at the analysis resolution.
+    The first backend is the reference for agreement: two backends agree on
+    a frame when both miss, or both find a face; IoU is averaged over the
+    frames where both found one.
+    """
+    stats = [BackendStats(create_detector(name)) for name in backends]
+    frames = 0
+    if not source.open():
+        raise IOError("Could not open the frame source")
+    try:
+        while source.is_opened() and (max_frames is None or frames < max_frames):
+            ret, frame = source.read()
+            if not ret:
+                continue
+            frame = cv2.flip(frame, 1)
+            h, w = frame.shape[:2]
+            height = int(h * analysis_width / w)
+            image = cv2.resize(frame, (analysis_width, height), interpolation=cv2.INTER_AREA)
+            frames += 1
+
+            reference = None
+            for i, entry in enumerate(stats):
+                box = _largest(entry.detector.detect(image))
+                entry.latencies.append(entry.detector.last_latency)
+                if box is not None:
+                    entry.detections += 1
+                if i == 0:
+                    reference = box
+                    continue
+                if (box is None) == (reference is None):
+                    entry.agreements += 1
+                if box is not None and reference is not None:
+                    entry.ious.append(_iou(box, reference))
+    finally:
+        source.release()
+    return frames, stats
+
+
+def report(frames, stats):
+    print(f"Frames: {frames}")
+    print(
+        f"{'backend':<8} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'detect %':>9} {'agree %':>8} {'mean IoU':>9}"
+    )
+    for i, entry in enumerate(stats):
+        if not entry.latencies:
+            continue
+        latencies = entry.latencies
+        mean = sum(latencies) / len(latencies)
+        agree = "ref" if i == 0 else f"{100 * entry.agreements / frames:.1f}"
+        iou = "-" if not entry.ious else f"{sum(entry.ious) / len(entry.ious):.2f}"
+        print(
+            f"{entry.detector.name:<8} {mean * 1000:>8.2f} "
+            f"{_percentile(latencies, 0.5) * 1000:>8.2f} "
+            f"{_percentile(latencies, 0.95) * 1000:>8.2f} "
+            f"{100 * entry.detections / frames:>9.1f} {agree:>8} {iou:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m src.detector_compare")
+    parser.add_argument(
+        "recording", nargs="?", help="session recorded with --record (default: camera)"
+    )
+    parser.add_argument("--camera", type=int, default=0, help="camera id without a recording")
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=sorted(DETECTOR_BACKENDS),
+        help=(
+            "backends to compare; the first one is the agreement reference "
+            "(default: every backend whose model files are installed)"
+        ),
+    )
+    parser.add_argument("--width", type=int, default=320, help="analysis width in pixels")
+    parser.add_argument(
+        "--max-frames", type=int, help="stop after this many frames (default: 200 for a camera)"
+    )
+    args = parser.parse_args()
+    if args.backends is None:
+        args.backends = available_backends()
+        missing = sorted(set(DETECTOR_BACKENDS) - set(args.backends))
+        if missing:
+            print(f"INFO: Skipping {', '.join(missing)} (model files not installed).")
+        if not args.backends:
+            print("ERROR: No face detector model files found.", file=sys.stderr)
+            sys.exit(1)
+
+    if args.recording:
+        source = ReplaySource(args.recording, speed=0)
+        max_frames = args.max_frames
+    else:
+        source = VideoCaptureSource(args.camera)
+        max_frames = args.max_frames or 200
+    try:
+        frames, stats = compare(source, args.backends, args.width, max_frames)
+    except (IOError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    report(frames, stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import threading
+from .face_detectors import FaceDetector, create_detector
+
+
+class DetectorPool:
+    """
+    Face detectors shared by the cameras analysed on the same worker thread.
+
+    Detectors keep per-call state and are not safe to use from two threads
+    at once, so each thread gets its own instance per detector configuration.
+    Cameras analysed on the same thread share it, so a model is loaded once
+    per analysis thread rather than once per camera.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._detectors = {}  # (thread id, params) -> FaceDetector
+
+    def get(self, params: tuple) -> FaceDetector:
+        """
+        The calling thread's detector for (name, scale_factor, min_neighbors),
+        loaded on first use. Raises IOError or ValueError like create_detector.
+        """
+        key = (threading.get_ident(), params)
+        with self._lock:
+            detector = self._detectors.get(key)
+        if detector is None:
+            name, scale_factor, min_neighbors = params
+            # Loaded outside the lock: only this thread can ask for this key.
+            detector = create_detector(
+                name, scale_factor=scale_factor, min_neighbors=min_neighbors
+            )
+            with self._lock:
+                # Drop this thread's detectors for older settings.
+                for stale in [k for k in self._detectors if k[0] == key[0]]:
+                    del self._detectors[stale]
+                self._detectors[key] = detector
+        return detector
@@ -0,0 +1,170 @@
+import os
+import time
+import cv2
+import numpy as np
+from .utils import resource_path
+
+
+class FaceDetector:
+    """
+    Common interface of the face-detection backends.
+
+    detect() takes a BGR image and returns (x, y, w, h) boxes in image
+    coordinates; min_size/max_size limit the face sizes searched for. Every
+    call is timed, so backends can be compared on the same hardware.
+    """
+
+    name = ""
+    # Model files the backend loads, relative to the application.
+    model_files = ()
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Whether the backend's model files are present, without loading them."""
+        return all(os.path.exists(resource_path(f)) for f in cls.model_files)
+
+    def __init__(self):
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.last_latency = 0.0
+
+    def detect(self, image: np.ndarray, min_size=None, max_size=None):
+        started = time.perf_counter()
+        faces = self._detect(image, min_size, max_size)
+        self.last_latency = time.perf_counter() - started
+        self.total_seconds += self.last_latency
+        self.calls += 1
+        return faces
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+    def _detect(self, image, min_size, max_size):
+        raise NotImplementedError
+
+
+def _cascade_path(cascade_file: str):
+    """
+    The cascade bundled under assets/, else the copy that ships with the
+    opencv-python wheel (cv2.data, Haar cascades only), else None.
+    """
+    path = resource_path(cascade_file)
+    if os.path.exists(path):
+        return path
+    data_dir = getattr(getattr(cv2, "data", None), "haarcascades", None)
+    if data_dir:
+        path = os.path.join(data_dir, os.path.basename(cascade_file))
+        if os.path.exists(path):
+            return path
+    return None
+
+
+class CascadeDetector(FaceDetector):
+    """OpenCV cascade classifier (Haar or LBP features)."""
+
+    cascade_file = ""
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return _cascade_path(cls.cascade_file) is not None
+
+    def __init__(self, scale_factor=1.1, min_neighbors=5):
+        super().__init__()
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        path = _cascade_path(self.cascade_file)
+        self.cascade = cv2.CascadeClassifier(path) if path else None
+        if self.cascade is None or self.cascade.empty():
+            raise IOError(f"Could not load {os.path.basename(self.cascade_file)}")
+
+    def _detect(self, image, min_size, max_size):
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return self.cascade.detectMultiScale(
+            gray,
+            self.scale_factor,
+            self.min_neighbors,
+            minSize=min_size or (0, 0),
+            maxSize=max_size or (0, 0),
+        )
+
+
+class HaarDetector(CascadeDetector):
+    name = "haar"
+    cascade_file = "assets/haarcascade_frontalface_default.xml"
+
+
+class LbpDetector(CascadeDetector):
+    """
+    LBP features: several times faster than Haar, somewhat less accurate.
+    The cascade is not in the opencv-python wheel; see the README.
+    """
+
+    name = "lbp"
+    cascade_file = "assets/lbpcascade_frontalface_improved.xml"
+
+
+class DnnDetector(FaceDetector):
+    """
+    OpenCV DNN ResNet-10 SSD face detector (Caffe model in assets/models,
+    fetched separately; see the README). Most robust to pose and lighting,
+    and the slowest.
+    """
+
+    name = "dnn"
+    PROTOTXT = "assets/models/deploy.prototxt"
+    WEIGHTS = "assets/models/res10_300x300_ssd_iter_140000.caffemodel"
+    model_files = (PROTOTXT, WEIGHTS)
+    INPUT_SIZE = (300, 300)
+    MEAN = (104.0, 177.0, 123.0)
+
+    def __init__(self, confidence=0.5, **_cascade_params):
+        super().__init__()
+        self.confidence = confidence
+        if not self.is_available():
+            raise IOError("Could not load the DNN face detector model")
+        self.net = cv2.dnn.readNetFromCaffe(
+            resource_path(self.PROTOTXT), resource_path(self.WEIGHTS)
+        )
+
+    def _detect(self, image, min_size, max_size):
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        h, w = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(image, 1.0, self.INPUT_SIZE, self.MEAN)
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+
+        faces = []
+        for detection in detections[detections[:, 2] >= self.confidence]:
+            x0, y0, x1, y1 = detection[3:7] * np.array([w, h, w, h])
+            x0, y0 = max(0, int(x0)), max(0, int(y0))
+            box_w, box_h = int(x1) - x0, int(y1) - y0
+            if box_w <= 0 or box_h <= 0:
+                continue
+            if min_size and (box_w < min_size[0] or box_h < min_size[1]):
+                continue
+            if max_size and (box_w > max_size[0] or box_h > max_size[1]):
+                continue
+            faces.append((x0, y0, box_w, box_h))
+        return faces
+
+
+DETECTOR_BACKENDS = {
+    HaarDetector.name: HaarDetector,
+    LbpDetector.name: LbpDetector,
+    DnnDetector.name: DnnDetector,
+}
+
+
+def available_backends() -> list:
+    """Names of the backends whose model files are present."""
+    return [name for name, backend in DETECTOR_BACKENDS.items() if backend.is_available()]
+
+
+def create_detector(name: str, **params) -> FaceDetector:
+    try:
+        backend = DETECTOR_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown face detector backend: {name}") from None
+    return backend(**params)
@@ -0,0 +1,72 @@
+import time
+import numpy as np
+
+
+class FaceTracker:
+    """
+    Restricts face detection to a padded region around the last detected face.
+
+    `detect` is called as detect(image, min_size, max_size) and returns a
+    sequence of (x, y, w, h) boxes. A full-image scan runs when there is no
+    previous face, when the region search misses, or when refresh_interval
+    seconds have passed since the last full scan (0 disables tracking).
+    """
+
+    def __init__(self, detect, padding=0.5, refresh_interval=5.0):
+        self.detect = detect
+        self.padding = padding
+        self.refresh_interval = refresh_interval
+        self.last_box = None
+        self._last_full_scan = 0.0
+
+    def reset(self):
+        self.last_box = None
+        self._last_full_scan = 0.0
+
+    def find_face(self, image: np.ndarray, now: float = None):
+        """Returns the largest face as (x, y, w, h) in image coordinates, or None."""
+        if now is None:
+            now = time.monotonic()
+
+        if (
+            self.last_box is not None
+            and self.refresh_interval > 0
+            and now - self._last_full_scan < self.refresh_interval
+        ):
+            box = self._search_region(image)
+            if box is not None:
+                self.last_box = box
+                return box
+
+        self._last_full_scan = now
+        self.last_box = self._largest(self.detect(image, None, None))
+        return self.last_box
+
+    def _search_region(self, image: np.ndarray):
+        x, y, w, h = self.last_box
+        img_h, img_w = image.shape[:2]
+        pad_x = int(w * self.padding)
+        pad_y = int(h * self.padding)
+        x0 = max(0, x - pad_x)
+        y0 = max(0, y - pad_y)
+        x1 = min(img_w, x + w + pad_x)
+        y1 = min(img_h, y + h + pad_y)
+        if x1 - x0 < w or y1 - y0 < h:
+            return None
+
+        # The face keeps roughly its size between ticks, so the scale
+        # pyramid can be limited as well as the search area.
+        min_size = (int(w * 0.7), int(h * 0.7))
+        max_size = (int(w * 1.4), int(h * 1.4))
+        box = self._largest(self.detect(image[y0:y1, x0:x1], min_size, max_size))
+        if box is None:
+            return None
+        bx, by, bw, bh = box
+        return (bx + x0, by + y0, bw, bh)
+
+    @staticmethod
+    def _largest(faces):
+        if len(faces) == 0:
+            return None
+        x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+        return (int(x), int(y), int(w), int(h))
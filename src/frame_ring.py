@@ -0,0 +1,123 @@
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+import numpy as np
+from PyQt6.QtCore import QMutex
+
+
+class BorrowedFrame(NamedTuple):
+    seq: int
+    timestamp: Optional[float]
+    frame: np.ndarray  # read-only view into a ring slot
+
+
+class FrameRing:
+    """
+    Fixed pool of preallocated frame buffers shared between the capture thread
+    and the analysis stage.
+
+    The writer fills a free slot in place and commits it, which makes it the
+    latest frame and gives it the next sequence number. Readers borrow the
+    latest frame as a read-only view; a borrowed slot is never handed to the
+    writer until it is returned, so no frame data is copied between stages.
+    Three slots are enough for one writer and one reader: one slot holds the
+    latest frame, one may be borrowed and the writer always has a third.
+    """
+
+    def __init__(self, slots: int = 3):
+        if slots < 3:
+            raise ValueError("FrameRing needs at least 3 slots")
+        self._buffers = [None] * slots
+        self._seqs = [0] * slots
+        self._timestamps = [None] * slots
+        self._borrowed = [0] * slots
+        self._latest = -1
+        self._seq = 0
+        self._requested = False
+        self._lock = QMutex()
+
+    @property
+    def latest_seq(self) -> int:
+        return self._seq
+
+    def request_frame(self):
+        """Asks an on-demand writer to decode and publish its next frame."""
+        self._lock.lock()
+        try:
+            self._requested = True
+        finally:
+            self._lock.unlock()
+
+    def take_request(self) -> bool:
+        """Returns True, and clears the request, if a reader is waiting for a frame."""
+        self._lock.lock()
+        try:
+            requested = self._requested
+            self._requested = False
+            return requested
+        finally:
+            self._lock.unlock()
+
+    def acquire_write(self, shape, dtype=np.uint8):
+        """Returns (index, buffer) of a slot the writer may fill in place."""
+        self._lock.lock()
+        try:
+            index = self._next_free_slot()
+        finally:
+            self._lock.unlock()
+
+        buffer = self._buffers[index]
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            # Only happens on the first frame or when the resolution changes.
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[index] = buffer
+        return index, buffer
+
+    def commit(self, index: int, timestamp: Optional[float] = None) -> int:
+        """Publishes a filled slot as the latest frame and returns its sequence number."""
+        self._lock.lock()
+        try:
+            self._seq += 1
+            self._seqs[index] = self._seq
+            self._timestamps[index] = timestamp
+            self._latest = index
+            return self._seq
+        finally:
+            self._lock.unlock()
+
+    @contextmanager
+    def borrow_latest(self):
+        """
+        Yields the latest frame as a BorrowedFrame, or None if nothing has been
+        committed yet. The view must not be used after the block exits.
+        """
+        self._lock.lock()
+        try:
+            index = self._latest
+            if index >= 0:
+                self._borrowed[index] += 1
+        finally:
+            self._lock.unlock()
+
+        if index < 0:
+            yield None
+            return
+
+        try:
+            view = self._buffers[index].view()
+            view.flags.writeable = False
+            yield BorrowedFrame(self._seqs[index], self._timestamps[index], view)
+        finally:
+            self._lock.lock()
+            try:
+                self._borrowed[index] -= 1
+            finally:
+                self._lock.unlock()
+
+    def _next_free_slot(self) -> int:
+        # Start after the latest slot so slots are reused round-robin.
+        count = len(self._buffers)
+        for offset in range(1, count + 1):
+            index = (self._latest + offset) % count
+            if index != self._latest and not self._borrowed[index]:
+                return index
+        raise RuntimeError("FrameRing has no free slot; too many concurrent readers")
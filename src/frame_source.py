@@ -0,0 +1,238 @@
+import os
+import struct
+import time
+import cv2
+import numpy as np
+
+# On-disk layout of a session recording:
+#   header:  MAGIC, then <H version>
+#   record:  <d capture_timestamp> <I payload_size> <payload: JPEG-encoded frame>
+RECORDING_MAGIC = b"PASREC"
+RECORDING_VERSION = 1
+_HEADER = struct.Struct("<H")
+_RECORD = struct.Struct("<dI")
+
+
+class FrameSource:
+    """
+    Minimal frame-source interface consumed by CameraService.
+    Mirrors the subset of the cv2.VideoCapture API the capture loop needs,
+    plus the capture timestamp of the last grabbed frame.
+    """
+
+    # True when grab() itself blocks to honour the source's own timing,
+    # so the capture loop must not add its sleep on top.
+    paced = False
+    # False for sources without a timeline (e.g. unthrottled replay): frames
+    # do not go stale, so on-demand capture fetches one only when asked.
+    realtime = True
+
+    def __init__(self):
+        self.timestamp = None
+
+    def open(self) -> bool:
+        raise NotImplementedError
+
+    def is_opened(self) -> bool:
+        raise NotImplementedError
+
+    def grab(self) -> bool:
+        raise NotImplementedError
+
+    def retrieve(self, out: np.ndarray = None):
+        raise NotImplementedError
+
+    def read(self, out: np.ndarray = None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(out)
+
+    def release(self):
+        pass
+
+
+class VideoCaptureSource(FrameSource):
+    """Live webcam source backed by cv2.VideoCapture."""
+
+    def __init__(self, camera_id=0):
+        super().__init__()
+        self.camera_id = camera_id
+        self.cap = None
+
+    def open(self) -> bool:
+        if self.cap is None:
+            self.cap = cv2.VideoCapture(self.camera_id)
+        if not self.cap.isOpened():
+            self.cap.open(self.camera_id)
+        return self.cap.isOpened()
+
+    def is_opened(self) -> bool:
+        return self.cap is not None and self.cap.isOpened()
+
+    def grab(self) -> bool:
+        ok = self.cap.grab()
+        if ok:
+            self.timestamp = time.time()
+        return ok
+
+    def retrieve(self, out: np.ndarray = None):
+        return self.cap.retrieve(out)
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+
+class RecordingSource(FrameSource):
+    """
+    Wraps another source and appends every retrieved frame, together with its
+    capture timestamp, to a session recording that ReplaySource can play back.
+    """
+
+    def __init__(self, source: FrameSource, path: str, jpeg_quality: int = 90):
+        super().__init__()
+        self.source = source
+        self.path = path
+        self.jpeg_quality = jpeg_quality
+        self.paced = source.paced
+        self._file = None
+
+    def open(self) -> bool:
+        if not self.source.open():
+            return False
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "wb")
+        self._file.write(RECORDING_MAGIC)
+        self._file.write(_HEADER.pack(RECORDING_VERSION))
+        return True
+
+    def is_opened(self) -> bool:
+        return self.source.is_opened()
+
+    def grab(self) -> bool:
+        ok = self.source.grab()
+        self.timestamp = self.source.timestamp
+        return ok
+
+    def retrieve(self, out: np.ndarray = None):
+        ret, frame = self.source.retrieve(out)
+        if ret and self._file:
+            encoded, payload = cv2.imencode(
+                ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+            )
+            if encoded:
+                timestamp = self.timestamp if self.timestamp is not None else time.time()
+                self._file.write(_RECORD.pack(timestamp, payload.size))
+                self._file.write(payload.tobytes())
+        return ret, frame
+
+    def release(self):
+        self.source.release()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class ReplaySource(FrameSource):
+    """
+    Plays back a session written by RecordingSource.
+
+    speed=1.0 reproduces the recorded timing, larger values replay
+    proportionally faster and speed=0 delivers frames as fast as they
+    can be decoded. The source closes itself at the end of the file
+    unless loop=True.
+    """
+
+    paced = True
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self.realtime = speed > 0
+        self.loop = loop
+        self._file = None
+        self._payload = None
+        self._data_offset = 0
+        self._first_timestamp = None
+        self._replay_started = None
+
+    def open(self) -> bool:
+        try:
+            self._file = open(self.path, "rb")
+        except OSError as e:
+            print(f"ERROR: Could not open recording {self.path} ({e}).")
+            return False
+        # A reopened replay starts over, paced from now.
+        self._payload = None
+        self._first_timestamp = None
+        self._replay_started = None
+        magic = self._file.read(len(RECORDING_MAGIC))
+        header = self._file.read(_HEADER.size)
+        if magic != RECORDING_MAGIC or len(header) != _HEADER.size:
+            print(f"ERROR: {self.path} is not a session recording.")
+            self.release()
+            return False
+        (version,) = _HEADER.unpack(header)
+        if version != RECORDING_VERSION:
+            print(f"ERROR: Unsupported recording version {version}.")
+            self.release()
+            return False
+        self._data_offset = self._file.tell()
+        return True
+
+    def is_opened(self) -> bool:
+        return self._file is not None
+
+    def _read_record(self):
+        header = self._file.read(_RECORD.size)
+        if len(header) < _RECORD.size:
+            return None
+        timestamp, size = _RECORD.unpack(header)
+        payload = self._file.read(size)
+        if len(payload) < size:
+            return None
+        return timestamp, payload
+
+    def grab(self) -> bool:
+        if self._file is None:
+            return False
+        record = self._read_record()
+        if record is None and self.loop:
+            self._file.seek(self._data_offset)
+            self._first_timestamp = None
+            record = self._read_record()
+        if record is None:
+            self.release()
+            return False
+
+        timestamp, self._payload = record
+        now = time.monotonic()
+        if self._first_timestamp is None:
+            self._first_timestamp = timestamp
+            self._replay_started = now
+        if self.speed > 0:
+            due = self._replay_started + (timestamp - self._first_timestamp) / self.speed
+            if due > now:
+                time.sleep(due - now)
+        self.timestamp = timestamp
+        return True
+
+    def retrieve(self, out: np.ndarray = None):
+        if self._payload is None:
+            return False, None
+        buffer = np.frombuffer(self._payload, dtype=np.uint8)
+        frame = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        if frame is None:
+            return False, None
+        if out is not None and out.shape == frame.shape and out.dtype == frame.dtype:
+            np.copyto(out, frame)
+            frame = out
+        return True, frame
+
+    def release(self):
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -1,4 +1,4 @@
-import numpy as np
+import os
 from PyQt6.QtWidgets import (
     QMainWindow,
     QVBoxLayout,
@@ -14,51 +14,55 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtGui import (
     QImage,
     QPixmap,
-    QIcon,
     QAction,
-    QPainter,
-    QColor,
-    QBrush,
     QShowEvent,
     QHideEvent,
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QEvent
 
-from .camera_service import CameraService
-from .processing_service import ProcessingService, PostureStatus
-from .settings_service import SettingsService
+from .camera_enumerator import CameraEnumerator
+from .monitoring_pipeline import MonitoringPipeline
 from .notification_service import NotificationService
-from .statistics_service import StatisticsService
-from .statistics_window import StatisticsWindow
+from .posture_status import PostureStatus
+from .metrics import metrics
 from .settings_window import SettingsWindow
+from .startup_profiler import profiler
+from .tray_icon_cache import TrayIconCache
 from .utils import resource_path
 
 
 class MainWindow(QMainWindow):
     visibility_changed = pyqtSignal(bool)
+    preview_size_changed = pyqtSignal(int, int)
 
-    def __init__(self):
+    def __init__(self, frame_source=None, record_path=None):
         super().__init__()
-        self.settings_service = SettingsService()
-        self.statistics_service = StatisticsService()
+        # --- Services ---
+        self.pipeline = MonitoringPipeline(
+            frame_source=frame_source, record_path=record_path, parent=self
+        )
+        self.settings_service = self.pipeline.settings_service
+        self.statistics_service = self.pipeline.statistics_service
+        self.camera_service = self.pipeline.camera_service
+        self.processing_service = self.pipeline.processing_service
+        # Replaying a recording: no camera is needed to start monitoring.
+        self.frame_source = frame_source
         self.setWindowTitle("Posture Assistant")
         self.setGeometry(100, 100, 800, 600)
 
-        # --- Services ---
-        self.camera_service = CameraService(
-            camera_id=self.settings_service.get("camera_id", 0)
-        )
-        self.processing_service = ProcessingService(self.settings_service)
+        with profiler.stage("CameraEnumerator"):
+            self.camera_enumerator = CameraEnumerator(self.settings_service, self)
+        self.statistics_window = None
         self.current_status = PostureStatus.NOT_DETECTED
-        self.previous_status = PostureStatus.NOT_DETECTED
 
         # --- System Tray and Notifications ---
-        self.tray_icon = QSystemTrayIcon(
-            QIcon(resource_path("assets/icon.png")), parent=self
-        )
-        self.tray_icon.setToolTip("Posture Assistant")
-        self.setup_tray_menu()
-        self.tray_icon.show()
+        with profiler.stage("Tray icon"):
+            self.tray_icon_cache = TrayIconCache(resource_path("assets/icon.png"))
+            self._tray_dot_color = None
+            self.tray_icon = QSystemTrayIcon(self.tray_icon_cache.icon(), parent=self)
+            self.tray_icon.setToolTip("Posture Assistant")
+            self.setup_tray_menu()
+            self.tray_icon.show()
 
         # --- Blinking Logic ---
         self.incorrect_posture_timer = QTimer(self)
@@ -72,15 +76,14 @@ class MainWindow(QMainWindow):
         self._blink_state = 0  # 0 for red, 1 for orange
 
         # --- Threading ---
-        self.processing_thread = QThread()
-        self.processing_service.moveToThread(self.processing_thread)
-        self.notification_service = NotificationService(
-            self.tray_icon, self.settings_service
-        )
+        with profiler.stage("NotificationService"):
+            self.notification_service = NotificationService(
+                self.tray_icon, self.settings_service
+            )
         self.notification_service.moveToThread(
-            self.processing_thread
+            self.pipeline.processing_thread
         )  # Can run in the same thread
-        self.processing_thread.start()
+        self.pipeline.start()
 
         # --- UI Elements ---
         self.central_widget = QWidget()
@@ -94,6 +97,7 @@ class MainWindow(QMainWindow):
         self.video_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.video_label.setMinimumSize(640, 480)
         self.video_label.setStyleSheet("background-color: black; color: white;")
+        self.video_label.installEventFilter(self)
         self.layout.addWidget(self.video_label, 1)
 
         # Controls
@@ -132,52 +136,78 @@ class MainWindow(QMainWindow):
 
         # Connect signals/slots
         self.start_stop_button.clicked.connect(self.toggle_monitoring)
-        self.calibrate_button.clicked.connect(self.processing_service.start_calibration)
+        self.calibrate_button.clicked.connect(self.pipeline.calibration_requested)
         self.stats_button.clicked.connect(self.show_statistics)
         self.settings_button.clicked.connect(self.show_settings)
         self.camera_combo.currentIndexChanged.connect(self.on_camera_changed)
 
         self.tray_icon.activated.connect(self.on_tray_icon_activated)
+        QApplication.instance().screenAdded.connect(self._on_screens_changed)
+        QApplication.instance().screenRemoved.connect(self._on_screens_changed)
 
-        self.camera_service.frame_ready.connect(
-            self.processing_service.update_latest_frame
-        )
         self.camera_service.camera_started.connect(
             self.on_camera_started
         )
         self.processing_service.processed_frame_ready.connect(self.update_video_feed)
-        self.processing_service.status_updated.connect(self.update_status)
-        self.processing_service.status_updated.connect(
+        # Fused across all monitored cameras.
+        self.pipeline.status_updated.connect(self.update_status)
+        self.pipeline.status_updated.connect(
             self.notification_service.handle_status_update
         )
-        self.processing_service.status_updated.connect(
-            self.statistics_service.handle_status_update
-        )
-        self.visibility_changed.connect(self.camera_service.on_visibility_changed)
-        self.visibility_changed.connect(self.processing_service.on_visibility_changed)
-
-        # Populate camera list after all connections are set up
+        self.visibility_changed.connect(self.pipeline.visibility_changed)
+        self.preview_size_changed.connect(self.processing_service.set_preview_size)
+
+        # Show the cameras found last time right away; the enumerator checks
+        # them on a worker thread and updates the list when they change.
+        self.camera_enumerator.cameras_changed.connect(self.populate_camera_list)
+        if self.frame_source is None:
+            self.camera_enumerator.refresh()
         self.populate_camera_list()
 
-    def populate_camera_list(self):
+    def populate_camera_list(self, available_cameras: list = None):
+        if available_cameras is None:
+            available_cameras = self.camera_enumerator.cameras
         self.camera_combo.blockSignals(True)
         self.camera_combo.clear()
-        available_cameras = CameraService.list_available_cameras()
+        if self.frame_source is not None:
+            path = getattr(self.frame_source, "path", None)
+            self.camera_combo.addItem(
+                os.path.basename(path) if path else "Recording"
+            )
+            self.camera_combo.setEnabled(False)
+            if not self.camera_service.isRunning():
+                self.start_stop_button.setEnabled(True)
+            self.camera_combo.blockSignals(False)
+            return
         if not available_cameras:
-            self.camera_combo.addItem("No cameras found")
+            self.camera_combo.addItem(
+                "Searching for cameras..."
+                if self.camera_enumerator.is_refreshing
+                else "No cameras found"
+            )
             self.camera_combo.setEnabled(False)
-            self.start_stop_button.setEnabled(False)
+            if not self.camera_service.isRunning():
+                self.start_stop_button.setEnabled(False)
+            self.camera_combo.blockSignals(False)
             return
 
-        saved_camera_id = self.settings_service.get("camera_id", 0)
+        # Keep the running camera selected; otherwise the saved one.
+        selected_id = (
+            self.camera_service.camera_id
+            if self.camera_service.isRunning()
+            else self.settings_service.get("camera_id", 0)
+        )
         current_idx = 0
         for i, cam_info in enumerate(available_cameras):
             self.camera_combo.addItem(cam_info["name"], userData=cam_info["id"])
-            if cam_info["id"] == saved_camera_id:
+            if cam_info["id"] == selected_id:
                 current_idx = i
 
         self.camera_combo.setCurrentIndex(current_idx)
-        self.on_camera_changed(current_idx)
+        if not self.camera_service.isRunning():
+            self.camera_combo.setEnabled(True)
+            self.start_stop_button.setEnabled(True)
+            self.on_camera_changed(current_idx)
         self.camera_combo.blockSignals(False)
 
     def on_camera_changed(self, index: int):
@@ -190,10 +220,10 @@ class MainWindow(QMainWindow):
 
     def toggle_monitoring(self):
         if self.camera_service.isRunning():
-            self.camera_service.stop()
+            self.pipeline.stop_cameras()
             self.start_stop_button.setText("Start")
             self.calibrate_button.setEnabled(False)
-            self.camera_combo.setEnabled(True)
+            self.camera_combo.setEnabled(self.frame_source is None)
             self.update_status(PostureStatus.NOT_DETECTED)
         else:
             self.camera_combo.setEnabled(False)
@@ -202,7 +232,7 @@ class MainWindow(QMainWindow):
             # Reset label in case of previous error
             self.video_label.setText("Camera feed will appear here.")
             self.video_label.setStyleSheet("background-color: black; color: white;")
-            self.camera_service.start()
+            self.pipeline.start_cameras()
 
     def on_camera_started(self, success: bool):
         """Handles the result of the camera starting attempt."""
@@ -212,20 +242,31 @@ class MainWindow(QMainWindow):
             self.calibrate_button.setEnabled(True)
         else:
             self.start_stop_button.setText("Start")
-            self.camera_combo.setEnabled(True)
+            self.camera_combo.setEnabled(self.frame_source is None)
             self.calibrate_button.setEnabled(False)
             self.video_label.setText(
                 "Failed to start camera. Check permissions or select another camera."
             )
             self.video_label.setStyleSheet("background-color: black; color: red;")
 
-    def update_video_feed(self, frame: np.ndarray):
-        h, w, ch = frame.shape
-        qt_image = QImage(frame.data, w, h, ch * w, QImage.Format.Format_BGR888)
-        pixmap = QPixmap.fromImage(qt_image)
-        self.video_label.setPixmap(
-            pixmap.scaled(self.video_label.size(), Qt.AspectRatioMode.KeepAspectRatio)
-        )
+    def update_video_feed(self, image: QImage):
+        metrics.observe_since("preview_delivery")
+        # Already scaled to the label and in the display's pixel format.
+        with metrics.time("update_video_feed"):
+            self.video_label.setPixmap(QPixmap.fromImage(image))
+
+    def _update_preview_size(self):
+        """Tells processing how large to render the preview; 0x0 while unseen."""
+        if self.isMinimized() or not self.video_label.isVisible():
+            self.preview_size_changed.emit(0, 0)
+            return
+        size = self.video_label.size()
+        self.preview_size_changed.emit(size.width(), size.height())
+
+    def eventFilter(self, obj, event):
+        if obj is self.video_label and event.type() == QEvent.Type.Resize:
+            self._update_preview_size()
+        return super().eventFilter(obj, event)
 
     def _start_blinking(self):
         """Starts the tray icon blinking process."""
@@ -250,36 +291,28 @@ class MainWindow(QMainWindow):
         self._update_tray_icon(self.current_status)
 
     def _update_tray_icon(self, status: PostureStatus):
-        # Update tray icon
-        base_pixmap = QPixmap(resource_path("assets/icon.png"))
-        if base_pixmap.isNull():
-            return
-
-        painter = QPainter(base_pixmap)
         dot_color = None
-
         if self._is_blinking:
-            dot_color = QColor("red") if self._blink_state == 0 else QColor("orange")
+            dot_color = "red" if self._blink_state == 0 else "orange"
         elif self.camera_service.isRunning():
             if status == PostureStatus.CORRECT:
-                dot_color = QColor("lightgreen")
+                dot_color = "lightgreen"
             elif status == PostureStatus.INCORRECT:
-                dot_color = QColor("red")
+                dot_color = "red"
             elif status == PostureStatus.NOT_DETECTED:
-                dot_color = QColor("yellow")
-
-        if dot_color:
-            radius = max(2, base_pixmap.width() // 8)
-            margin = max(1, base_pixmap.width() // 8)
-            x = base_pixmap.width() - (2 * radius) - margin
-            y = base_pixmap.height() - (2 * radius) - margin
+                dot_color = "yellow"
 
-            painter.setBrush(QBrush(dot_color))
-            painter.setPen(Qt.PenStyle.NoPen)
-            painter.drawEllipse(x, y, 3 * radius, 3 * radius)
+        # Status updates arrive several times per second; only touch the
+        # tray when the visible icon actually changes.
+        if dot_color == self._tray_dot_color:
+            return
+        self._tray_dot_color = dot_color
+        self.tray_icon.setIcon(self.tray_icon_cache.icon(dot_color))
 
-        painter.end()
-        self.tray_icon.setIcon(QIcon(base_pixmap))
+    def _on_screens_changed(self, screen):
+        # Device pixel ratios may have changed; rebuild the icon variants.
+        self.tray_icon_cache.clear()
+        self.tray_icon.setIcon(self.tray_icon_cache.icon(self._tray_dot_color))
 
     def _update_status_label(self, status: PostureStatus):
         # Update status label in main window
@@ -295,7 +328,7 @@ class MainWindow(QMainWindow):
             self.status_label.setText("Status: Incorrect")
             self.status_label.setStyleSheet("color: red;")
         elif status == PostureStatus.NOT_DETECTED:
-            if self.settings_service.get_calibration_data().get("reference_y") is None:
+            if self.settings_service.snapshot.calibration.reference_y is None:
                 self.status_label.setText("Status: Needs Calibration")
                 self.status_label.setStyleSheet("color: orange;")
             else:
@@ -303,7 +336,6 @@ class MainWindow(QMainWindow):
                 self.status_label.setStyleSheet("color: orange;")
 
     def update_status(self, status: PostureStatus):
-        self.previous_status = self.current_status
         self.current_status = status
 
         # --- Blinking Logic ---
@@ -318,7 +350,7 @@ class MainWindow(QMainWindow):
                 else:
                     # Otherwise, start a fresh timer.
                     threshold_ms = (
-                        self.settings_service.get("blinking_threshold_seconds", 300)
+                        self.settings_service.snapshot.blinking_threshold_seconds
                         * 1000
                     )
                     self.incorrect_posture_timer.start(threshold_ms)
@@ -338,14 +370,8 @@ class MainWindow(QMainWindow):
                 self._stop_blinking()
 
         # --- UI Updates ---
-        # To reduce flickering, show red icon only on the second consecutive 'INCORRECT' status.
-        tray_status = status
-        if status == PostureStatus.INCORRECT and self.previous_status != PostureStatus.INCORRECT:
-            # This is the first detection of incorrect posture.
-            # Keep the tray icon green to avoid flickering on false positives.
-            tray_status = PostureStatus.CORRECT
-
-        self._update_tray_icon(tray_status)
+        # Statuses are already debounced by ProcessingService.
+        self._update_tray_icon(status)
         self._update_status_label(status)
 
     def setup_tray_menu(self):
@@ -371,9 +397,14 @@ class MainWindow(QMainWindow):
         settings_dialog.exec()
 
     def show_statistics(self):
-        # We create a new dialog each time to ensure stats are fresh
-        stats_dialog = StatisticsWindow(self.statistics_service, self)
-        stats_dialog.exec()
+        # Created on first use and kept; it refreshes itself while shown.
+        if self.statistics_window is None:
+            from .statistics_window import StatisticsWindow
+
+            self.statistics_window = StatisticsWindow(self.statistics_service, self)
+        self.statistics_window.show()
+        self.statistics_window.raise_()
+        self.statistics_window.activateWindow()
 
     def on_tray_icon_activated(self, reason):
         if reason in (
@@ -392,11 +423,19 @@ class MainWindow(QMainWindow):
         """Override show event to notify services."""
         super().showEvent(event)
         self.visibility_changed.emit(True)
+        self._update_preview_size()
 
     def hideEvent(self, event: QHideEvent):
         """Override hide event to notify services."""
         super().hideEvent(event)
         self.visibility_changed.emit(False)
+        self._update_preview_size()
+
+    def changeEvent(self, event):
+        """Stops rendering the preview while the window is minimized."""
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self._update_preview_size()
 
     def closeEvent(self, event):
         event.ignore()
@@ -410,8 +449,5 @@ class MainWindow(QMainWindow):
             )
 
     def quit_application(self):
-        self.camera_service.stop()
-        self.statistics_service.close()
-        self.processing_thread.quit()
-        self.processing_thread.wait()
+        self.pipeline.shutdown()
         QApplication.instance().quit()
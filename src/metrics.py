@@ -0,0 +1,210 @@
+# Low-overhead pipeline instrumentation.
+# Stage timings go into fixed-size rolling histograms, next to plain counters
+# and event rates. They can be read as JSON or Prometheus text, served on
+# localhost with `python -m src --metrics-port 9464`:
+#   curl http://127.0.0.1:9464/metrics       (Prometheus text)
+#   curl http://127.0.0.1:9464/metrics.json
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+
+class RollingHistogram:
+    """The last `size` samples of a duration, in a preallocated ring."""
+
+    def __init__(self, size=512):
+        self._samples = np.zeros(size, dtype=np.float64)
+        self._next = 0
+        self.count = 0  # Samples observed since start, not only those kept
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self._samples[self._next] = seconds
+        self._next = (self._next + 1) % len(self._samples)
+        self.count += 1
+        self.total += seconds
+
+    def summary(self) -> dict:
+        kept = self._samples[: min(self.count, len(self._samples))]
+        if not len(kept):
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(kept, (50, 95, 99))
+        return {
+            "count": self.count,
+            "mean": float(kept.mean()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "max": float(kept.max()),
+        }
+
+
+class RateMeter:
+    """Events per second over the last `window` seconds."""
+
+    def __init__(self, window=5.0):
+        self.window = window
+        self._events = deque()
+
+    def mark(self, now: float):
+        self._events.append(now)
+        self._expire(now)
+
+    def _expire(self, now: float):
+        while self._events and now - self._events[0] > self.window:
+            self._events.popleft()
+
+    def rate(self, now: float) -> float:
+        self._expire(now)
+        return len(self._events) / self.window
+
+
+class MetricsRegistry:
+    """
+    Thread-safe collection of stage histograms, counters and rates. Metrics
+    are created on first use, so instrumenting a new stage is one call.
+    """
+
+    def __init__(self, histogram_size=512, rate_window=5.0):
+        self.histogram_size = histogram_size
+        self.rate_window = rate_window
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._rates = {}
+        self._stamps = {}
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = RollingHistogram(self.histogram_size)
+                self._histograms[stage] = histogram
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def stamp(self, name: str):
+        """Remembers when something was handed on, e.g. a signal emitted."""
+        self._stamps[name] = time.perf_counter()
+
+    def observe_since(self, name: str):
+        """Observes the time since stamp(name), e.g. when the signal arrives."""
+        started = self._stamps.pop(name, None)
+        if started is not None:
+            self.observe(name, time.perf_counter() - started)
+
+    def increment(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def mark(self, rate: str):
+        now = time.monotonic()
+        with self._lock:
+            meter = self._rates.get(rate)
+            if meter is None:
+                meter = RateMeter(self.rate_window)
+                self._rates[rate] = meter
+            meter.mark(now)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "stages": {
+                    name: histogram.summary()
+                    for name, histogram in sorted(self._histograms.items())
+                },
+                "counters": dict(sorted(self._counters.items())),
+                "rates": {
+                    name: meter.rate(now) for name, meter in sorted(self._rates.items())
+                },
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix="posture_") -> str:
+        data = self.snapshot()
+        lines = [
+            f"# HELP {prefix}stage_seconds Duration of pipeline stages (recent samples).",
+            f"# TYPE {prefix}stage_seconds summary",
+        ]
+        for stage, summary in data["stages"].items():
+            if not summary["count"]:
+                continue
+            for quantile in ("p50", "p95", "p99"):
+                lines.append(
+                    f'{prefix}stage_seconds{{stage="{stage}",'
+                    f'quantile="0.{quantile[1:]}"}} {summary[quantile]:.6f}'
+                )
+            lines.append(f'{prefix}stage_seconds_count{{stage="{stage}"}} {summary["count"]}')
+        for counter, value in data["counters"].items():
+            lines.append(f"# TYPE {prefix}{counter}_total counter")
+            lines.append(f"{prefix}{counter}_total {value}")
+        for rate, value in data["rates"].items():
+            lines.append(f"# TYPE {prefix}{rate} gauge")
+            lines.append(f"{prefix}{rate} {value:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared by every service in the process.
+metrics = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = metrics
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = self.registry.to_prometheus().encode()
+            content_type = "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body = self.registry.to_json().encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # No access log on stderr
+
+
+class MetricsServer:
+    """Serves a registry over HTTP on localhost only, from a daemon thread."""
+
+    def __init__(self, port: int, registry: MetricsRegistry = metrics):
+        handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="MetricsServer", daemon=True
+        )
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+        print(f"INFO: Serving metrics on http://127.0.0.1:{self.port}/metrics")
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
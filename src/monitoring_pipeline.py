@@ -0,0 +1,182 @@
+from functools import partial
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from .camera_service import CameraService, CAPTURE_ON_DEMAND
+from .cpu_governor import CpuGovernor
+from .detector_pool import DetectorPool
+from .processing_service import ProcessingService
+from .settings_service import SettingsService
+from .startup_profiler import profiler
+from .statistics_retention import RetentionPolicy
+from .statistics_service import StatisticsService
+from .status_fusion import StatusFuser
+
+
+class MonitoringPipeline(QObject):
+    """
+    The camera -> processing -> statistics chain without any UI, shared by
+    the desktop window and the headless daemon.
+
+    The main camera (`camera_service`/`processing_service`) may be joined by
+    the cameras in the `extra_camera_ids` setting. Each camera has its own
+    ProcessingService and calibration; all of them run on a fixed set of
+    `analysis_workers` threads and share one detector per thread and one CPU
+    budget, so adding a camera adds work to the same threads instead of
+    new ones. Their statuses are fused into `status_updated`.
+
+    Processing of the main camera runs on `processing_thread`; other QObjects
+    may be moved to that thread before start(). shutdown() stops the cameras,
+    logs the final interval and waits for the threads.
+    """
+
+    # Forwarded to every camera and ProcessingService.
+    visibility_changed = pyqtSignal(bool)
+    calibration_requested = pyqtSignal()
+
+    def __init__(
+        self, frame_source=None, record_path=None, camera_id=None, parent=None
+    ):
+        super().__init__(parent)
+        with profiler.stage("SettingsService"):
+            self.settings_service = SettingsService()
+        with profiler.stage("StatisticsService"):
+            self.statistics_service = StatisticsService(
+                retention=self._retention_policy(self.settings_service.snapshot)
+            )
+        self.settings_service.settings_changed.connect(self._apply_retention)
+        workers = max(1, self.settings_service.snapshot.analysis_workers)
+        self.analysis_threads = [QThread() for _ in range(workers)]
+        self.processing_thread = self.analysis_threads[0]
+        self.detector_pool = DetectorPool()
+        self.governor = CpuGovernor()
+        self.status_fuser = StatusFuser(self)
+        self.status_updated = self.status_fuser.status_updated
+        self._is_visible = True
+
+        with profiler.stage("CameraService"):
+            self.camera_service = CameraService(
+                camera_id=(
+                    self.settings_service.get("camera_id", 0)
+                    if camera_id is None
+                    else camera_id
+                ),
+                frame_source=frame_source,
+                record_path=record_path,
+                capture_mode=self.settings_service.get(
+                    "capture_mode", CAPTURE_ON_DEMAND
+                ),
+            )
+        with profiler.stage("ProcessingService"):
+            # Without an explicit camera, processing follows the camera_id
+            # setting (the window's camera selection); an explicit one is
+            # classified and calibrated as itself.
+            self.processing_service = self._create_processing(
+                self.camera_service, camera_id, self.processing_thread
+            )
+        self.camera_service.camera_started.connect(self._on_camera_started)
+        # Additional cameras: camera id -> (CameraService, ProcessingService).
+        self.extra_cameras = {}
+
+        self.visibility_changed.connect(self._remember_visibility)
+        self.status_updated.connect(self.statistics_service.handle_status_update)
+
+    @staticmethod
+    def _retention_policy(snapshot) -> RetentionPolicy:
+        return RetentionPolicy(
+            raw_days=snapshot.statistics_raw_retention_days,
+            minute_days=snapshot.statistics_minute_retention_days,
+            hour_days=snapshot.statistics_hour_retention_days,
+        )
+
+    def _apply_retention(self, snapshot):
+        self.statistics_service.set_retention(self._retention_policy(snapshot))
+
+    def _create_processing(self, camera_service, camera_id, thread):
+        processing = ProcessingService(
+            self.settings_service,
+            camera_service.frame_ring,
+            camera_id=camera_id,
+            detector_pool=self.detector_pool,
+            governor=self.governor,
+        )
+        processing.moveToThread(thread)
+        camera_service.frame_ready.connect(processing.on_frame_ready)
+        camera_service.camera_started.connect(processing.on_camera_started)
+        self.visibility_changed.connect(camera_service.on_visibility_changed)
+        self.visibility_changed.connect(processing.on_visibility_changed)
+        self.calibration_requested.connect(processing.start_calibration)
+        processing.status_updated.connect(partial(self.status_fuser.update, camera_id))
+        return processing
+
+    def _remember_visibility(self, is_visible: bool):
+        self._is_visible = is_visible
+
+    def _sync_extra_cameras(self):
+        """Adds and removes additional cameras to match the settings."""
+        main_id = self.camera_service.camera_id
+        wanted = [
+            camera_id
+            for camera_id in dict.fromkeys(
+                self.settings_service.snapshot.extra_camera_ids
+            )
+            if camera_id != main_id
+        ]
+        for camera_id in [c for c in self.extra_cameras if c not in wanted]:
+            camera, processing = self.extra_cameras.pop(camera_id)
+            self.status_fuser.forget(camera_id)
+            processing.deleteLater()
+            camera.deleteLater()
+
+        added = False
+        for index, camera_id in enumerate(wanted):
+            if camera_id in self.extra_cameras:
+                continue
+            camera = CameraService(
+                camera_id=camera_id,
+                capture_mode=self.settings_service.get(
+                    "capture_mode", CAPTURE_ON_DEMAND
+                ),
+            )
+            # The main camera is on the first thread; spread the rest.
+            thread = self.analysis_threads[(index + 1) % len(self.analysis_threads)]
+            processing = self._create_processing(camera, camera_id, thread)
+            camera.camera_started.connect(partial(self._on_extra_started, camera_id))
+            camera.finished.connect(partial(self.status_fuser.forget, camera_id))
+            self.extra_cameras[camera_id] = (camera, processing)
+            added = True
+        if added:
+            # New services start with the default cadence.
+            self.visibility_changed.emit(self._is_visible)
+
+    def start(self):
+        """Starts the analysis threads; the cameras are started separately."""
+        for thread in self.analysis_threads:
+            thread.start()
+
+    def start_cameras(self):
+        """Starts the main camera; the additional ones follow once it runs."""
+        self._sync_extra_cameras()
+        self.status_fuser.reset()
+        self.camera_service.start()
+
+    def _on_camera_started(self, success: bool):
+        if success:
+            for camera, _ in self.extra_cameras.values():
+                camera.start()
+
+    def _on_extra_started(self, camera_id: int, success: bool):
+        if not success:
+            print(f"ERROR: Could not open camera {camera_id}; continuing without it.")
+
+    def stop_cameras(self):
+        for camera, _ in self.extra_cameras.values():
+            camera.stop()
+        self.camera_service.stop()
+
+    def shutdown(self):
+        self.stop_cameras()
+        self.statistics_service.close()
+        self.settings_service.flush()
+        for thread in self.analysis_threads:
+            thread.quit()
+        for thread in self.analysis_threads:
+            thread.wait()
@@ -0,0 +1,51 @@
+import time
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Cheap scene-change detector used to skip face detection on static frames.
+
+    Each frame is reduced to a tiny grayscale thumbnail and compared with the
+    thumbnail of the last analysed frame. Motion energy is the mean absolute
+    difference in gray levels (0-255); detection is needed when it reaches
+    `threshold`, or when `max_staleness` seconds have passed since the last
+    analysis. A threshold of 0 disables gating.
+    """
+
+    def __init__(self, threshold=4.0, max_staleness=10.0, size=(32, 24)):
+        self.threshold = threshold
+        self.max_staleness = max_staleness
+        self.size = size
+        self._thumbnail = np.empty((size[1], size[0]), dtype=np.uint8)
+        self._reference = None
+        self._last_analysis = 0.0
+        self.motion_energy = 0.0
+
+    def reset(self):
+        self._reference = None
+        self._last_analysis = 0.0
+
+    def has_motion(self, frame: np.ndarray, now: float = None) -> bool:
+        if now is None:
+            now = time.monotonic()
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._thumbnail)
+
+        if (
+            self.threshold <= 0
+            or self._reference is None
+            or now - self._last_analysis >= self.max_staleness
+        ):
+            return True
+        self.motion_energy = float(cv2.absdiff(self._thumbnail, self._reference).mean())
+        return self.motion_energy >= self.threshold
+
+    def mark_analyzed(self, now: float = None):
+        """Makes the thumbnail from the last has_motion() call the new reference."""
+        self._last_analysis = time.monotonic() if now is None else now
+        if self._reference is None:
+            self._reference = self._thumbnail.copy()
+        else:
+            np.copyto(self._reference, self._thumbnail)
@@ -1,6 +1,5 @@
 from PyQt6.QtCore import QObject, QTimer, QUrl
 from PyQt6.QtWidgets import QSystemTrayIcon
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from .processing_service import PostureStatus
 from .utils import resource_path
 
@@ -15,13 +14,23 @@ class NotificationService(QObject):
         self.timer.timeout.connect(self.show_notification)
         self.notification_timer_remaining_ms = -1  # For pausing the timer
         self.current_status = PostureStatus.NOT_DETECTED
-        self.media_player = QMediaPlayer(self)
-        self.audio_output = QAudioOutput(self)
-        self.media_player.setAudioOutput(self.audio_output)
-        sound_file = self.settings.get(
-            "notification_sound_file", resource_path("assets/wilhelm.ogg")
-        )
-        self.media_player.setSource(QUrl.fromLocalFile(sound_file))
+        # QtMultimedia starts the platform's media backend, so the player is
+        # created when the first notification sounds, not at startup.
+        self.media_player = None
+        self.audio_output = None
+
+    def _get_media_player(self):
+        if self.media_player is None:
+            from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+
+            self.media_player = QMediaPlayer(self)
+            self.audio_output = QAudioOutput(self)
+            self.media_player.setAudioOutput(self.audio_output)
+            sound_file = self.settings.get(
+                "notification_sound_file", resource_path("assets/wilhelm.ogg")
+            )
+            self.media_player.setSource(QUrl.fromLocalFile(sound_file))
+        return self.media_player
 
     def handle_status_update(self, status: PostureStatus):
         self.current_status = status
@@ -58,7 +67,8 @@ class NotificationService(QObject):
                 QSystemTrayIcon.MessageIcon.Information,
                 3000,  # msecs
             )
-            if self.media_player.source().isValid():
+            media_player = self._get_media_player()
+            if media_player.source().isValid():
                 # Stop and play to ensure the sound restarts from the beginning.
-                self.media_player.stop()
-                self.media_player.play()
+                media_player.stop()
+                media_player.play()
@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+
+GUIDE_COLOR = (0, 255, 0, 255)
+REFERENCE_COLOR = (0, 255, 255, 255)
+LINE_THICKNESS = 2
+
+
+class OverlayCompositor:
+    """
+    Draws the calibration guides and the face box onto the display-size
+    preview (BGRA pixels).
+
+    The guides only change with the calibration or the preview size, so
+    they are drawn once into a layer that covers just the rows they touch,
+    together with a mask of their pixels. Each frame then only copies that
+    band onto the preview; the face box, which moves, is drawn directly.
+    """
+
+    def __init__(self):
+        self._key = None
+        self._top = 0
+        self._layer = None
+        self._mask = None
+
+    def clear(self):
+        self._key = None
+        self._layer = None
+        self._mask = None
+
+    def compose(self, image: np.ndarray, scale: float, calibration, face=None, face_color=None):
+        """
+        `face` is (x, y, w, h) in frame coordinates and `scale` converts
+        frame to preview pixels.
+        """
+        if face is not None:
+            x, y, w, h = (int(v * scale) for v in face)
+            cv2.rectangle(
+                image, (x, y), (x + w, y + h), tuple(face_color) + (255,), LINE_THICKNESS
+            )
+        if calibration.reference_y is None:
+            return
+
+        key = (image.shape, scale, calibration.reference_y, calibration.tolerance_pixels)
+        if key != self._key:
+            self._build_guides(image.shape, scale, calibration)
+            self._key = key
+        if self._layer is None:
+            return
+        band = image[self._top : self._top + self._layer.shape[0]]
+        np.copyto(band, self._layer[: band.shape[0]], where=self._mask[: band.shape[0]])
+
+    def _build_guides(self, shape, scale: float, calibration):
+        height, width = shape[:2]
+        ref_y = int(calibration.reference_y * scale)
+        tolerance = int(calibration.tolerance_pixels * scale)
+        top = max(0, ref_y - tolerance - LINE_THICKNESS)
+        bottom = min(height, ref_y + tolerance + LINE_THICKNESS + 1)
+        if bottom <= top:
+            self._layer = None
+            self._mask = None
+            return
+
+        layer = np.zeros((bottom - top, width, shape[2]), dtype=np.uint8)
+        for y, color in (
+            (ref_y - tolerance, GUIDE_COLOR),
+            (ref_y + tolerance, GUIDE_COLOR),
+            (ref_y, REFERENCE_COLOR),
+        ):
+            cv2.line(layer, (0, y - top), (width, y - top), color, LINE_THICKNESS)
+        self._top = top
+        self._layer = layer
+        # The layer is opaque where a line was drawn.
+        self._mask = layer[:, :, 3:] > 0
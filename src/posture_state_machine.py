@@ -0,0 +1,82 @@
+from collections import deque
+from typing import Mapping, Optional
+from .posture_status import PostureStatus
+
+
+class PostureStateMachine:
+    """
+    Debounces raw per-frame posture classifications into confirmed states.
+
+    A new state is confirmed when it wins at least `votes_needed` of the last
+    `vote_window` classifications and has kept that majority for the dwell
+    time of the transition. Dwell times are looked up as "FROM->TO" (e.g.
+    "CORRECT->INCORRECT"), then by target state name, and default to 0.
+
+    update() returns the state to publish: the confirmed state on the first
+    call, on every confirmed transition and as a heartbeat every
+    `heartbeat_seconds` while nothing changes; otherwise None.
+    """
+
+    def __init__(
+        self,
+        dwell_seconds: Mapping[str, float] = None,
+        vote_window: int = 5,
+        votes_needed: int = 3,
+        heartbeat_seconds: float = 30.0,
+    ):
+        self.dwell_seconds = dict(dwell_seconds or {})
+        self.votes_needed = votes_needed
+        self.heartbeat_seconds = heartbeat_seconds
+        self._votes = deque(maxlen=vote_window)
+        self.reset()
+
+    @property
+    def vote_window(self) -> int:
+        return self._votes.maxlen
+
+    @vote_window.setter
+    def vote_window(self, size: int):
+        if size != self._votes.maxlen:
+            self._votes = deque(self._votes, maxlen=size)
+
+    def reset(self, status: PostureStatus = PostureStatus.NOT_DETECTED):
+        self.confirmed = status
+        self._votes.clear()
+        self._candidate = None
+        self._candidate_since = 0.0
+        self._last_emit = None
+
+    def _dwell(self, target: PostureStatus) -> float:
+        key = f"{self.confirmed.name}->{target.name}"
+        if key in self.dwell_seconds:
+            return self.dwell_seconds[key]
+        return self.dwell_seconds.get(target.name, 0.0)
+
+    def _majority(self) -> Optional[PostureStatus]:
+        counts = {}
+        for status in self._votes:
+            counts[status] = counts.get(status, 0) + 1
+        status, count = max(counts.items(), key=lambda item: item[1])
+        needed = min(self.votes_needed, self._votes.maxlen)
+        return status if count >= needed else None
+
+    def update(self, raw: PostureStatus, now: float) -> Optional[PostureStatus]:
+        self._votes.append(raw)
+        majority = self._majority()
+
+        if majority is None or majority == self.confirmed:
+            self._candidate = None
+        else:
+            if majority != self._candidate:
+                self._candidate = majority
+                self._candidate_since = now
+            if now - self._candidate_since >= self._dwell(majority):
+                self.confirmed = majority
+                self._candidate = None
+                self._last_emit = now
+                return self.confirmed
+
+        if self._last_emit is None or now - self._last_emit >= self.heartbeat_seconds:
+            self._last_emit = now
+            return self.confirmed
+        return None
@@ -0,0 +1,7 @@
+from enum import Enum, auto
+
+
+class PostureStatus(Enum):
+    CORRECT = auto()
+    INCORRECT = auto()
+    NOT_DETECTED = auto()
@@ -1,139 +1,341 @@
+import time
 import cv2
 import numpy as np
-from enum import Enum, auto
-from PyQt6.QtCore import QObject, pyqtSignal, QTimer, QMutex, pyqtSlot
-from .utils import resource_path
-
-
-class PostureStatus(Enum):
-    CORRECT = auto()
-    INCORRECT = auto()
-    NOT_DETECTED = auto()
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer, pyqtSlot
+from PyQt6.QtGui import QImage
+from .cpu_governor import CpuGovernor
+from .detector_pool import DetectorPool
+from .face_tracker import FaceTracker
+from .metrics import metrics
+from .motion_gate import MotionGate
+from .overlay_compositor import OverlayCompositor
+from .posture_state_machine import PostureStateMachine
+from .posture_status import PostureStatus
 
 
 class ProcessingService(QObject):
     status_updated = pyqtSignal(PostureStatus)
-    processed_frame_ready = pyqtSignal(np.ndarray)
+    processed_frame_ready = pyqtSignal(QImage)
+    # Sequence number and raw (not debounced) status of every analysed frame.
+    frame_analyzed = pyqtSignal(int, PostureStatus)
+
+    # Seconds between analyses while the window is shown and while hidden.
+    VISIBLE_INTERVAL = 0.25
+    HIDDEN_INTERVAL = 1.5
 
-    def __init__(self, settings_service, parent=None):
+    def __init__(
+        self,
+        settings_service,
+        frame_ring,
+        camera_id=None,
+        detector_pool=None,
+        governor=None,
+        parent=None,
+    ):
         super().__init__(parent)
         self.settings = settings_service
+        self.frame_ring = frame_ring
+        # None follows the main camera (settings camera_id); an additional
+        # camera has its own id and calibration.
+        self.camera_id = camera_id
         self._is_visible = True  # Assume visible at start
         self._is_calibrating = False
 
-        cascade_path = resource_path("assets/haarcascade_frontalface_default.xml")
-        self.face_cascade = cv2.CascadeClassifier(cascade_path)
-        if self.face_cascade.empty():
-            raise IOError("Could not load haarcascade_frontalface_default.xml")
+        # Several cameras' services may share the detector pool and the
+        # governor, and with them the detectors and the CPU budget.
+        self.detector_pool = detector_pool or DetectorPool()
+        self.face_detector = None
+        self._detector_params = None
+        self._loaded_params = None  # Last params tried, loaded or not
+        self.face_tracker = FaceTracker(self._detect_faces)
+        self._tracker_width = None  # Analysis width of the tracked box
+        self.motion_gate = MotionGate()
+        self.governor = governor or CpuGovernor()
+        # Only confirmed transitions (plus a slow heartbeat) are emitted.
+        self.state_machine = PostureStateMachine()
+        # Analysis is driven by frame arrival: the single-shot timer only
+        # marks when the cadence allows the next one (see _on_analysis_due).
+        self._awaiting_frame = False
+        self._last_seq = 0  # Sequence number of the last analysed frame
+        self._last_analysis = 0.0
+        self.frames_analyzed = 0
+        self.frames_dropped = 0
+        self.analysis_timer = QTimer(self)
+        self.analysis_timer.setSingleShot(True)
+        self.analysis_timer.timeout.connect(self._on_analysis_due)
+        self._apply_settings(self.settings.snapshot)
+        self.settings.settings_changed.connect(self._apply_settings)
+        self._last_face = None
 
-        self._last_frame = None
-        self._frame_lock = QMutex()
+        # The preview is rendered at the size of the GUI's video label, into
+        # a reused BGR buffer and an RGB32 image the GUI can show as is.
+        self._preview_size = (0, 0)
+        self._preview_bgr = None
+        self._preview_image = None
+        self.overlay = OverlayCompositor()
 
-        self.analysis_timer = QTimer(self)
-        self.analysis_timer.timeout.connect(self._analyze_frame)
+    def _analysis_interval(self) -> float:
+        interval = self.VISIBLE_INTERVAL if self._is_visible else self.HIDDEN_INTERVAL
+        return interval * self.governor.interval_scale
 
     def _update_timer_state(self):
-        interval = 250 if self._is_visible else 1500
-        self.analysis_timer.start(interval)
+        """(Re)plans the next analysis from the last one and the current cadence."""
+        due = self._last_analysis + self._analysis_interval()
+        delay = max(0.0, due - time.monotonic())
+        self.analysis_timer.start(int(delay * 1000))
 
     @pyqtSlot(bool)
     def on_visibility_changed(self, is_visible: bool):
-        """Stops/starts analysis timer based on window visibility."""
+        """Switches the analysis cadence based on window visibility."""
         self._is_visible = is_visible
-        self._update_timer_state()
+        if not self._awaiting_frame:
+            self._update_timer_state()
+
+    @pyqtSlot(int, int)
+    def set_preview_size(self, width: int, height: int):
+        """Sets the area the preview is shown in; 0x0 turns the preview off."""
+        self._preview_size = (width, height)
 
+    @pyqtSlot(object)
+    def _apply_settings(self, snapshot):
+        detector_params = (
+            snapshot.face_detector,
+            snapshot.face_detector_scale_factor,
+            snapshot.face_detector_min_neighbors,
+        )
+        # The detector itself is loaded on first use (see _ensure_detector).
+        self._detector_params = detector_params
+        self.face_tracker.refresh_interval = (
+            snapshot.face_tracking_refresh_seconds
+            if snapshot.face_tracking_enabled
+            else 0
+        )
+        self.motion_gate.threshold = (
+            snapshot.motion_threshold if snapshot.motion_gate_enabled else 0
+        )
+        self.motion_gate.max_staleness = snapshot.motion_max_staleness_seconds
+        self.governor.enabled = snapshot.cpu_governor_enabled
+        self.governor.target_percent = snapshot.cpu_target_percent
+        if not snapshot.cpu_governor_enabled:
+            self.governor.reset()
+            if self.analysis_timer.isActive():
+                self._update_timer_state()
+        self.state_machine.dwell_seconds = dict(snapshot.status_dwell_seconds)
+        self.state_machine.vote_window = snapshot.status_vote_window
+        self.state_machine.votes_needed = snapshot.status_votes_needed
+        self.state_machine.heartbeat_seconds = snapshot.status_heartbeat_seconds
+
+    @pyqtSlot(bool)
+    def on_camera_started(self, success: bool):
+        """Forgets state from the previous run so the new one starts clean."""
+        self.state_machine.reset()
+        self.face_tracker.reset()
+        self.motion_gate.reset()
+        self._last_face = None
+
+    @pyqtSlot()
     def start_calibration(self):
         self._is_calibrating = True
 
-    @pyqtSlot(np.ndarray)
-    def update_latest_frame(self, frame: np.ndarray):
-        """Receives a new frame from the camera and stores it for analysis."""
-        self._frame_lock.lock()
-        try:
-            self._last_frame = frame.copy()
-        finally:
-            self._frame_lock.unlock()
-
-    def _analyze_frame(self):
-        """Periodically called by a timer to analyze the last received frame."""
-        self._frame_lock.lock()
-        if self._last_frame is None:
-            self._frame_lock.unlock()
-            return
-        # Make a local copy to work with and release the lock
-        frame = self._last_frame.copy()
-        self._frame_lock.unlock()
+    def _ensure_detector(self) -> bool:
+        """
+        Loads the configured face detector if it changed since the last try.
+        A detector that fails to load is not retried until the settings change;
+        the previous one, if any, stays in use.
+        """
+        if self._detector_params != self._loaded_params:
+            self._loaded_params = self._detector_params
+            name = self._detector_params[0]
+            try:
+                detector = self.detector_pool.get(self._detector_params)
+            except (IOError, ValueError) as e:
+                if self.face_detector is None:
+                    print(f"ERROR: Could not load the {name} face detector ({e}).")
+                else:
+                    print(f"ERROR: Keeping the {self.face_detector.name} detector ({e}).")
+            else:
+                self.face_detector = detector
+                self.face_tracker.reset()
+        return self.face_detector is not None
 
-        output_frame = frame.copy()
+    def _detect_faces(self, image: np.ndarray, min_size=None, max_size=None):
+        faces = self.face_detector.detect(image, min_size, max_size)
+        metrics.observe("detector", self.face_detector.last_latency)
+        return faces
 
+    def _detect_face(self, frame: np.ndarray):
+        """Returns the largest face as (x, y, w, h) in frame coordinates, or None."""
+        if not self._ensure_detector():
+            return None
         # Resize image for faster analysis
         h, w, _ = frame.shape
-        analysis_width = 320
+        analysis_width = self.governor.analysis_width
+        if analysis_width != self._tracker_width:
+            # The tracked box is in analysis-resolution coordinates.
+            self.face_tracker.reset()
+            self._tracker_width = analysis_width
         scale = w / analysis_width
         analysis_height = int(h / scale)
 
-        resized_frame = cv2.resize(
-            frame, (analysis_width, analysis_height), interpolation=cv2.INTER_AREA
+        with metrics.time("analysis_resize"):
+            resized_frame = cv2.resize(
+                frame, (analysis_width, analysis_height), interpolation=cv2.INTER_AREA
+            )
+
+        # Backends convert to the color space they need themselves.
+        face = self.face_tracker.find_face(resized_frame)
+        if face is None:
+            return None
+
+        # Scale coordinates back to original frame size for calibration and drawing
+        x, y, w_face, h_face = face
+        return (int(x * scale), int(y * scale), int(w_face * scale), int(h_face * scale))
+
+    def _calibration(self):
+        snapshot = self.settings.snapshot
+        if self.camera_id is None:
+            return snapshot.calibration
+        return snapshot.calibration_for(self.camera_id)
+
+    def _classify(self, face) -> PostureStatus:
+        """Compares the face's top edge with this camera's calibrated reference."""
+        calibration = self._calibration()
+        if face is None or calibration.reference_y is None:
+            return PostureStatus.NOT_DETECTED
+        if abs(face[1] - calibration.reference_y) <= calibration.tolerance_pixels:
+            return PostureStatus.CORRECT
+        return PostureStatus.INCORRECT
+
+    def _preview_scale(self, frame: np.ndarray) -> float:
+        """Scale from frame to preview pixels, or 0 when no preview is needed."""
+        width, height = self._preview_size
+        if not self._is_visible or width <= 0 or height <= 0:
+            return 0.0
+        h, w = frame.shape[:2]
+        return min(width / w, height / h)
+
+    def _render_preview(self, frame: np.ndarray, scale: float) -> np.ndarray:
+        """
+        Resizes the frame into the preview image and returns a writable view
+        of its pixels for drawing the overlays.
+        """
+        h, w = frame.shape[:2]
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        if self._preview_bgr is None or self._preview_bgr.shape[1::-1] != size:
+            self._preview_bgr = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self._preview_image = QImage(size[0], size[1], QImage.Format.Format_RGB32)
+        cv2.resize(frame, size, dst=self._preview_bgr, interpolation=cv2.INTER_AREA)
+
+        # bits() detaches the image if the GUI still holds the previous
+        # frame, so a frame being shown is never drawn over.
+        bits = self._preview_image.bits()
+        bits.setsize(self._preview_image.sizeInBytes())
+        pixels = np.ndarray(
+            (size[1], size[0], 4),
+            dtype=np.uint8,
+            buffer=bits,
+            strides=(self._preview_image.bytesPerLine(), 4, 1),
         )
-        gray = cv2.cvtColor(resized_frame, cv2.COLOR_BGR2GRAY)
-
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 5)
-
-        status = PostureStatus.NOT_DETECTED
-        if len(faces) > 0:
-            # Get largest face from resized detection
-            x, y, w_face, h_face = sorted(
-                faces, key=lambda f: f[2] * f[3], reverse=True
-            )[0]
-
-            # Scale coordinates back to original frame size for calibration and drawing
-            orig_x = int(x * scale)
-            orig_y = int(y * scale)
-            orig_w = int(w_face * scale)
-            orig_h = int(h_face * scale)
-
-            if self._is_calibrating:
-                ref_y_int = int(orig_y)
-                current_tolerance = self.settings.get_calibration_data().get(
-                    "tolerance_pixels", 50
-                )
-                self.settings.set_calibration_data(ref_y_int, current_tolerance)
-                self._is_calibrating = False
-
-            calibration_data = self.settings.get_calibration_data()
-            ref_y = calibration_data.get("reference_y")
-            if ref_y is not None:
-                tolerance = calibration_data.get("tolerance_pixels", 50)
-                status = (
-                    PostureStatus.CORRECT
-                    if abs(orig_y - ref_y) <= tolerance
-                    else PostureStatus.INCORRECT
-                )
+        # RGB32 is stored as B, G, R, 0xFF bytes on little-endian machines.
+        cv2.cvtColor(self._preview_bgr, cv2.COLOR_BGR2BGRA, dst=pixels)
+        return pixels
 
-            color = (0, 255, 0) if status == PostureStatus.CORRECT else (0, 0, 255)
-            cv2.rectangle(
-                output_frame,
-                (orig_x, orig_y),
-                (orig_x + orig_w, orig_y + orig_h),
-                color,
-                2,
-            )
+    @pyqtSlot()
+    def _on_analysis_due(self):
+        """
+        The cadence allows another analysis. A frame newer than the last
+        analysed one is analysed right away (continuous capture); otherwise
+        the camera is asked for one and on_frame_ready analyses it on arrival.
+        """
+        if self.frame_ring.latest_seq > self._last_seq:
+            self._analyze_latest()
+        else:
+            self._awaiting_frame = True
+            self.frame_ring.request_frame()
 
-        self.status_updated.emit(status)
-        if self._is_visible:
-            self._draw_overlays(output_frame)
-            self.processed_frame_ready.emit(output_frame)
-
-    def _draw_overlays(self, frame: np.ndarray):
-        calibration_data = self.settings.get_calibration_data()
-        ref_y = calibration_data.get("reference_y")
-        if ref_y is not None:
-            tolerance = calibration_data.get("tolerance_pixels", 50)
-            w = frame.shape[1]
-            cv2.line(
-                frame, (0, ref_y - tolerance), (w, ref_y - tolerance), (0, 255, 0), 2
-            )
-            cv2.line(
-                frame, (0, ref_y + tolerance), (w, ref_y + tolerance), (0, 255, 0), 2
+    @pyqtSlot(int)
+    def on_frame_ready(self, seq: int):
+        """Analyzes the new frame if the cadence allows; otherwise it waits."""
+        metrics.observe_since("frame_delivery")
+        if not self._awaiting_frame or seq <= self._last_seq:
+            # Not due yet: when it is, the latest frame wins.
+            return
+        self._awaiting_frame = False
+        self._analyze_latest()
+
+    def _analyze_latest(self):
+        with self.frame_ring.borrow_latest() as borrowed:
+            if borrowed is None or borrowed.seq <= self._last_seq:
+                # Never analyse a frame twice; wait for the next one.
+                self._awaiting_frame = True
+                self.frame_ring.request_frame()
+                return
+            # Frames published since the last analysed one were never used.
+            if self._last_seq:
+                skipped = max(0, borrowed.seq - self._last_seq - 1)
+                self.frames_dropped += skipped
+                metrics.increment("frames_dropped", skipped)
+            self._last_seq = borrowed.seq
+            with metrics.time("analyze"):
+                status = self._analyze(borrowed.frame)
+            self.frame_analyzed.emit(borrowed.seq, status)
+            self.frames_analyzed += 1
+            metrics.increment("frames_analyzed")
+            metrics.mark("analysis_fps")
+        self._last_analysis = time.monotonic()
+        self._update_timer_state()
+
+    def _analyze(self, frame: np.ndarray) -> PostureStatus:
+        """Analyses one frame and returns its raw classification."""
+        # The frame is a read-only view into the ring; the preview is drawn
+        # on a display-size copy instead, and only when it can be seen.
+        preview_scale = self._preview_scale(frame)
+        preview = None
+        if preview_scale:
+            with metrics.time("preview_render"):
+                preview = self._render_preview(frame, preview_scale)
+
+        # Skip detection while the scene is static and reuse the last face box.
+        started = time.perf_counter()
+        detect_seconds = 0.0
+        with metrics.time("motion_gate"):
+            motion = self.motion_gate.has_motion(frame)
+        if self._is_calibrating or motion:
+            detect_started = time.perf_counter()
+            self._last_face = self._detect_face(frame)
+            detect_seconds = time.perf_counter() - detect_started
+            self.governor.record_stage("detect", detect_seconds)
+            metrics.observe("detect", detect_seconds)
+            self.motion_gate.mark_analyzed()
+
+        if self._last_face is not None and self._is_calibrating:
+            # Only updates the in-memory settings; the file is written
+            # later, off this thread.
+            self.settings.set_calibration_data(
+                int(self._last_face[1]),
+                self._calibration().tolerance_pixels,
+                self.camera_id,
             )
-            cv2.line(frame, (0, ref_y), (w, ref_y), (0, 255, 255), 2)
+            self._is_calibrating = False
+        status = self._classify(self._last_face)
+
+        confirmed = self.state_machine.update(status, time.monotonic())
+        if confirmed is not None:
+            self.status_updated.emit(confirmed)
+        if preview is not None:
+            color = (0, 255, 0) if status == PostureStatus.CORRECT else (0, 0, 255)
+            with metrics.time("overlay"):
+                self.overlay.compose(
+                    preview,
+                    preview_scale,
+                    self._calibration(),
+                    self._last_face,
+                    color,
+                )
+            metrics.stamp("preview_delivery")
+            self.processed_frame_ready.emit(self._preview_image)
+        self.governor.record_stage(
+            "other", time.perf_counter() - started - detect_seconds
+        )
+        self.governor.update()
+        return status
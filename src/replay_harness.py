@@ -0,0 +1,176 @@
+# Headless throughput/latency harness: replays a recorded session through
+# CameraService -> ProcessingService and reports what comes out.
+# python -m src.replay_harness session.pasrec --speed 0
+
+import argparse
+import sys
+import time
+from collections import Counter
+from PyQt6.QtCore import QCoreApplication, QObject, QThread, QTimer, Qt, pyqtSignal
+from .camera_service import CameraService, CAPTURE_CONTINUOUS, CAPTURE_ON_DEMAND
+from .frame_source import ReplaySource
+from .metrics import metrics
+from .processing_service import ProcessingService
+from .settings_service import SettingsService
+
+
+class ReplayHarness(QObject):
+    visibility_changed = pyqtSignal(bool)
+
+    def __init__(self, args, parent=None):
+        super().__init__(parent)
+        self.args = args
+        self.frames_in = 0
+        self.analyses = Counter()  # Raw status of every analysed frame
+        self.transitions = Counter()  # Confirmed statuses (incl. heartbeats)
+        self.latencies = []
+        self._frame_times = {}  # seq -> publish time, until analysed
+        self._last_activity = None  # Last frame in or analysis out
+
+        # Replays never read or write the user's settings file.
+        self.settings = SettingsService(persistent=False)
+        self.settings.set_calibration_data(args.reference_y, args.tolerance)
+        source = ReplaySource(args.recording, speed=args.speed, loop=args.loop)
+        self.camera_service = CameraService(
+            frame_source=source,
+            capture_mode=CAPTURE_CONTINUOUS if args.continuous else CAPTURE_ON_DEMAND,
+        )
+        self.processing_service = ProcessingService(
+            self.settings, self.camera_service.frame_ring
+        )
+        if args.max_rate:
+            # Analyse whenever a new frame is available, to measure throughput.
+            self.processing_service.VISIBLE_INTERVAL = 0
+            self.processing_service.HIDDEN_INTERVAL = 0
+        self.processing_thread = QThread()
+        self.processing_service.moveToThread(self.processing_thread)
+
+        # Direct connections: the counters are updated in the emitting thread
+        # so that queueing delays do not skew the measurement.
+        self.camera_service.frame_ready.connect(
+            self._on_frame, Qt.ConnectionType.DirectConnection
+        )
+        self.camera_service.frame_ready.connect(self.processing_service.on_frame_ready)
+        self.processing_service.frame_analyzed.connect(
+            self._on_analyzed, Qt.ConnectionType.DirectConnection
+        )
+        self.processing_service.status_updated.connect(
+            self._on_status, Qt.ConnectionType.DirectConnection
+        )
+        self.camera_service.camera_started.connect(
+            self.processing_service.on_camera_started
+        )
+        self.visibility_changed.connect(self.processing_service.on_visibility_changed)
+        self.camera_service.finished.connect(self._on_replay_finished)
+
+    def _on_frame(self, seq):
+        self._frame_times[seq] = self._last_activity = time.perf_counter()
+        self.frames_in += 1
+
+    def _on_analyzed(self, seq, status):
+        self._last_activity = time.perf_counter()
+        published = self._frame_times.get(seq)
+        if published is not None:
+            self.latencies.append(self._last_activity - published)
+        # Frames up to this one will never be analysed.
+        for old in [s for s in self._frame_times if s <= seq]:
+            del self._frame_times[old]
+        self.analyses[status.name] += 1
+
+    def _on_status(self, status):
+        self.transitions[status.name] += 1
+
+    def start(self):
+        self.processing_thread.start()
+        self.visibility_changed.emit(not self.args.hidden)
+        self.started_at = time.perf_counter()
+        self.camera_service.start()
+        if self.args.duration:
+            QTimer.singleShot(int(self.args.duration * 1000), self.stop)
+
+    def _on_replay_finished(self):
+        # Give the analysis timer a chance to consume the last frame.
+        QTimer.singleShot(500 if not self.args.hidden else 1600, self.stop)
+
+    def stop(self):
+        # Not counting the wait for the last frame after the replay ended.
+        self.elapsed = (self._last_activity or time.perf_counter()) - self.started_at
+        self.camera_service.stop()
+        self.processing_thread.quit()
+        self.processing_thread.wait()
+        self.report()
+        QCoreApplication.instance().quit()
+
+    def report(self):
+        elapsed = max(self.elapsed, 1e-9)
+        analysed = sum(self.analyses.values())
+        transitions = sum(self.transitions.values())
+        print(f"Recording:        {self.args.recording}")
+        print(f"Elapsed:          {elapsed:.2f} s")
+        print(f"Frames in:        {self.frames_in} ({self.frames_in / elapsed:.1f} fps)")
+        print(f"Frames analysed:  {analysed} ({analysed / elapsed:.1f} /s)")
+        for name, count in sorted(self.analyses.items()):
+            print(f"  {name:<16}{count}")
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            p50 = latencies[len(latencies) // 2]
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(
+                f"Frame->analysis:  p50 {p50 * 1000:.1f} ms, "
+                f"p95 {p95 * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms"
+            )
+        analyze = metrics.snapshot()["stages"].get("analyze", {})
+        if analyze.get("count"):
+            # What one processing thread could sustain with no cadence limit.
+            print(
+                f"Analysis:         mean {analyze['mean'] * 1000:.1f} ms, "
+                f"max {1 / analyze['mean']:.1f} analyses/s"
+            )
+        # Debounced: confirmed transitions plus heartbeats.
+        print(f"Statuses out:     {transitions}")
+        for name, count in sorted(self.transitions.items()):
+            print(f"  {name:<16}{count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m src.replay_harness")
+    parser.add_argument("recording", help="session recorded with --record")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="replay speed multiplier, 0 for unthrottled (default: 1.0)",
+    )
+    parser.add_argument("--loop", action="store_true", help="loop the recording")
+    parser.add_argument(
+        "--duration", type=float, help="stop after this many seconds"
+    )
+    parser.add_argument(
+        "--hidden",
+        action="store_true",
+        help="analyse at the tray-only cadence instead of the window cadence",
+    )
+    parser.add_argument(
+        "--max-rate",
+        action="store_true",
+        help="analyse every new frame instead of at the window/tray cadence",
+    )
+    parser.add_argument(
+        "--continuous",
+        action="store_true",
+        help="decode every frame instead of only the frames analysis asks for",
+    )
+    parser.add_argument(
+        "--reference-y", type=int, help="calibrated reference Y in frame pixels"
+    )
+    parser.add_argument("--tolerance", type=int, default=50)
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv[:1])
+    harness = ReplayHarness(args)
+    QTimer.singleShot(0, harness.start)
+    sys.exit(app.exec())
+
+
+if __name__ == "__main__":
+    main()
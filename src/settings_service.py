@@ -1,22 +1,144 @@
+import copy
 import json
 import os
-from typing import Dict, Any
-from PyQt6.QtCore import QStandardPaths
+import secrets
+import stat
+import threading
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
+from PyQt6.QtCore import QObject, QStandardPaths, pyqtSignal
 from .utils import resource_path
 
 
-class SettingsService:
-    def __init__(self, filename: str = "settings.json"):
-        app_data_path = QStandardPaths.writableLocation(
-            QStandardPaths.StandardLocation.AppDataLocation
-        )
-        # Убедимся, что директория существует
-        os.makedirs(app_data_path, exist_ok=True)
-        self.filepath = os.path.join(app_data_path, filename)
+@dataclass(frozen=True)
+class CalibrationData:
+    reference_y: Optional[int] = None
+    tolerance_pixels: int = 50
+
+
+def _calibration(defaults: Dict[str, Any], data: Optional[Dict[str, Any]]) -> CalibrationData:
+    data = {**defaults, **(data or {})}
+    return CalibrationData(
+        reference_y=data.get("reference_y"),
+        tolerance_pixels=data.get("tolerance_pixels", 50),
+    )
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    """
+    Immutable, typed view of the settings at one point in time.
+    A new snapshot replaces the old one on every change, so readers on any
+    thread can use it without locking.
+    """
+
+    version: int
+    camera_id: int
+    extra_camera_ids: Tuple[int, ...]
+    capture_mode: str
+    calibration: CalibrationData
+    camera_calibrations: Mapping[str, CalibrationData]
+    notifications_enabled: bool
+    notification_delay_seconds: int
+    blinking_threshold_seconds: int
+    notification_sound_file: str
+    face_detector: str
+    face_detector_scale_factor: float
+    face_detector_min_neighbors: int
+    face_tracking_enabled: bool
+    face_tracking_refresh_seconds: float
+    motion_gate_enabled: bool
+    motion_threshold: float
+    motion_max_staleness_seconds: float
+    status_dwell_seconds: Mapping[str, float]
+    status_vote_window: int
+    status_votes_needed: int
+    status_heartbeat_seconds: float
+    cpu_governor_enabled: bool
+    cpu_target_percent: float
+    analysis_workers: int
+    statistics_raw_retention_days: int
+    statistics_minute_retention_days: int
+    statistics_hour_retention_days: int
+
+    @classmethod
+    def from_dict(cls, settings: Dict[str, Any], defaults: Dict[str, Any]):
+        values = {}
+        for field in fields(cls):
+            if field.name == "calibration":
+                values["calibration"] = _calibration(
+                    defaults["calibration_data"], settings.get("calibration_data")
+                )
+            elif field.name == "camera_calibrations":
+                values["camera_calibrations"] = MappingProxyType(
+                    {
+                        str(camera_id): _calibration(defaults["calibration_data"], data)
+                        for camera_id, data in (
+                            settings.get("camera_calibrations") or {}
+                        ).items()
+                    }
+                )
+            else:
+                value = settings.get(field.name, defaults[field.name])
+                if isinstance(value, dict):
+                    value = MappingProxyType(dict(value))
+                elif isinstance(value, list):
+                    value = tuple(value)
+                values[field.name] = value
+        # A camera calibrated on its own overrides the shared calibration_data.
+        own = values["camera_calibrations"].get(str(values["camera_id"]))
+        if own is not None:
+            values["calibration"] = own
+        return cls(**values)
+
+    def calibration_for(self, camera_id: int) -> CalibrationData:
+        """
+        Calibration of one camera. The main camera falls back to
+        calibration_data; other cameras start uncalibrated.
+        """
+        calibration = self.camera_calibrations.get(str(camera_id))
+        if calibration is not None:
+            return calibration
+        if camera_id == self.camera_id:
+            return self.calibration
+        return CalibrationData(tolerance_pixels=self.calibration.tolerance_pixels)
+
+
+class SettingsService(QObject):
+    # Emitted with the new SettingsSnapshot whenever a value changes.
+    settings_changed = pyqtSignal(object)
+
+    # Changes are coalesced and written this many seconds after the first one.
+    SAVE_DELAY_SECONDS = 1.0
+
+    def __init__(self, filename: str = "settings.json", persistent: bool = True, parent=None):
+        super().__init__(parent)
+        # A non-persistent service starts from defaults and never touches disk.
+        self.persistent = persistent
+        if persistent:
+            app_data_path = QStandardPaths.writableLocation(
+                QStandardPaths.StandardLocation.AppDataLocation
+            )
+            # Убедимся, что директория существует
+            os.makedirs(app_data_path, exist_ok=True)
+            self.filepath = os.path.join(app_data_path, filename)
+        else:
+            self.filepath = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Serializes whole writes
+        # Cameras calibrate from different threads; serializes their
+        # read-modify-write of camera_calibrations.
+        self._calibration_lock = threading.Lock()
+        self._save_timer = None
+        self._dirty = False
         self.settings = self._load()
+        self.snapshot = SettingsSnapshot.from_dict(
+            self.settings, self._get_default_settings()
+        )
 
     def _load(self) -> Dict[str, Any]:
-        if os.path.exists(self.filepath):
+        if self.filepath and os.path.exists(self.filepath):
             try:
                 with open(self.filepath, "r") as f:
                     return json.load(f)
@@ -25,33 +147,176 @@ class SettingsService:
         return self._get_default_settings()
 
     def save(self):
-        with open(self.filepath, "w") as f:
-            json.dump(self.settings, f, indent=2)
+        """Writes the settings now, atomically (temp file, fsync, rename)."""
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self.persistent or not self._dirty:
+                    return
+                data = json.dumps(self.settings, indent=2)
+                self._dirty = False
+            self._write(data)
+
+    def _write(self, data: str):
+        try:
+            fd, tmp_path = self._create_temp(os.path.dirname(self.filepath))
+        except OSError as e:
+            print(f"ERROR: Could not save settings ({e}).")
+            return
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            # The rename carries the temp file's mode over; keep the user's.
+            if os.path.exists(self.filepath):
+                os.chmod(tmp_path, stat.S_IMODE(os.stat(self.filepath).st_mode))
+            os.replace(tmp_path, self.filepath)
+        except OSError as e:
+            print(f"ERROR: Could not save settings ({e}).")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _create_temp(directory: str):
+        """
+        A new temp file in `directory`. Unlike tempfile.mkstemp (always 0600),
+        it gets the umask's default mode, like a settings file written directly.
+        """
+        while True:
+            path = os.path.join(directory, f".settings-{secrets.token_hex(6)}")
+            try:
+                return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), path
+            except FileExistsError:
+                continue
+
+    def flush(self):
+        """Writes pending changes immediately, e.g. before quitting."""
+        self.save()
 
     def get(self, key: str, default: Any = None) -> Any:
-        return self.settings.get(key, default)
+        return copy.deepcopy(self.settings.get(key, default))
 
     def set(self, key: str, value: Any):
-        self.settings[key] = value
-        self.save()
+        self.update({key: value})
+
+    def update(self, values: Dict[str, Any]):
+        """Applies several changes as one snapshot, one signal and one write."""
+        with self._lock:
+            changed = {
+                key: copy.deepcopy(value)
+                for key, value in values.items()
+                if self.settings.get(key) != value
+            }
+            if not changed:
+                return
+            self.settings = {**self.settings, **changed}
+            self.snapshot = SettingsSnapshot.from_dict(
+                self.settings, self._get_default_settings()
+            )
+            snapshot = self.snapshot
+            self._dirty = True
+            if self.persistent and self._save_timer is None:
+                self._save_timer = threading.Timer(self.SAVE_DELAY_SECONDS, self.save)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+        self.settings_changed.emit(snapshot)
 
     def _get_default_settings(self) -> Dict[str, Any]:
         return {
             "version": 1,
             "camera_id": 0,
+            # Watched together with camera_id; posture is fused across them.
+            "extra_camera_ids": [],
+            # Cameras found by the last enumeration, shown at startup.
+            "camera_list": [],
+            "capture_mode": "demand",
             "calibration_data": {"reference_y": None, "tolerance_pixels": 50},
+            # Per-camera calibration keyed by camera id (as a string).
+            "camera_calibrations": {},
             "notifications_enabled": True,
             "notification_delay_seconds": 1800,
             "blinking_threshold_seconds": 300,
             "notification_sound_file": resource_path("assets/wilhelm.ogg"),
+            # Face detection backend: "haar", "lbp" or "dnn" (see face_detectors).
+            "face_detector": "haar",
+            "face_detector_scale_factor": 1.1,
+            "face_detector_min_neighbors": 5,
+            "face_tracking_enabled": True,
+            "face_tracking_refresh_seconds": 5,
+            "motion_gate_enabled": True,
+            "motion_threshold": 4.0,
+            "motion_max_staleness_seconds": 10,
+            # Posture debouncing: seconds a new state must hold its majority
+            # before it is reported, keyed "FROM->TO" or by target state.
+            "status_dwell_seconds": {
+                "CORRECT": 0.5,
+                "INCORRECT": 2.0,
+                "NOT_DETECTED": 3.0,
+            },
+            "status_vote_window": 5,
+            "status_votes_needed": 3,
+            "status_heartbeat_seconds": 30,
+            # Analysis cadence, resolution and OpenCV threads adapt to keep
+            # the app under this share of one CPU core.
+            "cpu_governor_enabled": True,
+            "cpu_target_percent": 10,
+            # Threads analysing the cameras; they share one detector each.
+            "analysis_workers": 1,
+            # Days of raw intervals and of minute/hour rollups kept in
+            # statistics.db (0 keeps everything); daily totals are kept forever.
+            "statistics_raw_retention_days": 90,
+            "statistics_minute_retention_days": 14,
+            "statistics_hour_retention_days": 400,
         }
 
-    def get_calibration_data(self) -> Dict[str, Any]:
-        return self.get(
-            "calibration_data", self._get_default_settings()["calibration_data"]
+    def get_calibration_data(self, camera_id: Optional[int] = None) -> Dict[str, Any]:
+        """Calibration of one camera, the main camera by default."""
+        calibration = (
+            self.snapshot.calibration
+            if camera_id is None
+            else self.snapshot.calibration_for(camera_id)
         )
+        return {
+            "reference_y": calibration.reference_y,
+            "tolerance_pixels": calibration.tolerance_pixels,
+        }
 
-    def set_calibration_data(self, ref_y: int, tolerance: int):
-        self.set(
-            "calibration_data", {"reference_y": ref_y, "tolerance_pixels": tolerance}
-        )
+    def set_calibration_data(
+        self, ref_y: int, tolerance: int, camera_id: Optional[int] = None
+    ):
+        """
+        Stores the calibration of one camera, the main camera by default.
+        The main camera's is also kept in calibration_data.
+        """
+        data = {"reference_y": ref_y, "tolerance_pixels": tolerance}
+        with self._calibration_lock:
+            main_camera_id = self.snapshot.camera_id
+            if camera_id is None:
+                camera_id = main_camera_id
+            calibrations = self.get("camera_calibrations", {})
+            calibrations[str(camera_id)] = data
+            values = {"camera_calibrations": calibrations}
+            if camera_id == main_camera_id:
+                values["calibration_data"] = data
+            self.update(values)
+
+    def set_tolerance(self, tolerance: int):
+        """Sets the posture tolerance of every camera."""
+        with self._calibration_lock:
+            calibration_data = self.get_calibration_data()
+            calibration_data["tolerance_pixels"] = tolerance
+            calibrations = {
+                camera_id: {**data, "tolerance_pixels": tolerance}
+                for camera_id, data in self.get("camera_calibrations", {}).items()
+            }
+            self.update(
+                {
+                    "calibration_data": calibration_data,
+                    "camera_calibrations": calibrations,
+                }
+            )
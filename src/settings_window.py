@@ -6,6 +6,7 @@ from PyQt6.QtWidgets import (
     QCheckBox,
     QDialogButtonBox,
     QGroupBox,
+    QLineEdit,
 )
 from PyQt6.QtCore import Qt
 
@@ -32,6 +33,11 @@ class SettingsWindow(QDialog):
         self.tolerance_spinbox.setSuffix(" pixels")
         processing_layout.addRow("Posture Tolerance:", self.tolerance_spinbox)
 
+        # Watched together with the selected camera, each calibrated on its own.
+        self.extra_cameras_edit = QLineEdit()
+        self.extra_cameras_edit.setPlaceholderText("Camera numbers, e.g. 1, 2")
+        processing_layout.addRow("Additional Cameras:", self.extra_cameras_edit)
+
         processing_group.setLayout(processing_layout)
         layout.addWidget(processing_group)
 
@@ -74,6 +80,9 @@ class SettingsWindow(QDialog):
         """Loads current settings and populates the UI controls."""
         calib_data = self.settings_service.get_calibration_data()
         self.tolerance_spinbox.setValue(calib_data.get("tolerance_pixels", 50))
+        self.extra_cameras_edit.setText(
+            ", ".join(str(i) for i in self.settings_service.get("extra_camera_ids", []))
+        )
 
         self.notifications_enabled_checkbox.setChecked(
             self.settings_service.get("notifications_enabled", True)
@@ -87,18 +96,25 @@ class SettingsWindow(QDialog):
 
     def accept(self):
         """Saves the settings and closes the dialog."""
-        calib_data = self.settings_service.get_calibration_data()
-        calib_data["tolerance_pixels"] = self.tolerance_spinbox.value()
-        self.settings_service.set("calibration_data", calib_data)
-
-        self.settings_service.set(
-            "notifications_enabled", self.notifications_enabled_checkbox.isChecked()
-        )
-        self.settings_service.set(
-            "notification_delay_seconds", self.delay_spinbox.value()
-        )
-        self.settings_service.set(
-            "blinking_threshold_seconds", self.blinking_threshold_spinbox.value()
+        self.settings_service.set_tolerance(self.tolerance_spinbox.value())
+        self.settings_service.update(
+            {
+                "extra_camera_ids": self._parse_camera_ids(
+                    self.extra_cameras_edit.text()
+                ),
+                "notifications_enabled": self.notifications_enabled_checkbox.isChecked(),
+                "notification_delay_seconds": self.delay_spinbox.value(),
+                "blinking_threshold_seconds": self.blinking_threshold_spinbox.value(),
+            }
         )
 
         super().accept()
+
+    @staticmethod
+    def _parse_camera_ids(text: str) -> list:
+        """Camera numbers from a comma or space separated list, ignoring the rest."""
+        ids = []
+        for part in text.replace(",", " ").split():
+            if part.isdigit() and int(part) not in ids:
+                ids.append(int(part))
+        return ids
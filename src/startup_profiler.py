@@ -0,0 +1,49 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """
+    Times named startup stages (imports, service constructors) for
+    `python -m src --profile-startup`. Stages may nest; disabled, stage()
+    costs next to nothing, so it can stay in the startup path.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.stages = []  # (depth, name, seconds), in completion order
+        self._depth = 0
+
+    def enable(self):
+        self.enabled = True
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        index = len(self.stages)
+        self.stages.append((self._depth, name, None))
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.stages[index] = (self._depth, name, time.perf_counter() - started)
+
+    def report(self, milestone: str):
+        """Prints every stage and the time from enable() to `milestone`."""
+        if not self.enabled:
+            return
+        print("Startup profile:")
+        for depth, name, seconds in self.stages:
+            label = "  " * depth + name
+            print(f"  {label:<40} {seconds * 1000:8.1f} ms")
+        total = time.perf_counter() - self.started
+        print(f"  {'Total to ' + milestone:<40} {total * 1000:8.1f} ms")
+
+
+profiler = StartupProfiler()
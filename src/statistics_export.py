@@ -0,0 +1,205 @@
+# Streaming export of posture history.
+# python -m src.statistics_export history.csv --from 2025-01-01 --to 2025-07-01
+
+import argparse
+import csv
+import json
+import os
+import pathlib
+import sqlite3
+import sys
+import tempfile
+import zipfile
+from datetime import datetime
+import numpy as np
+from .statistics_rollup import ROLLUP_TABLES, backfill_pending
+from .utils import app_data_path
+
+# table key -> (table name, time column used for range filters, columns, numpy dtypes)
+EXPORT_TABLES = {
+    "log": (
+        "posture_log",
+        "start_timestamp",
+        ("id", "start_timestamp", "end_timestamp", "duration_seconds", "state"),
+        ("i8", "f8", "f8", "f8", "U16"),
+    ),
+}
+for _unit, _table in ROLLUP_TABLES.items():
+    EXPORT_TABLES[_unit] = (
+        _table,
+        "bucket_start",
+        ("bucket_start", "state", "duration_seconds"),
+        ("f8", "U16", "f8"),
+    )
+
+FORMATS = ("csv", "jsonl", "npz")
+
+
+def _where(time_column, start, end):
+    clauses, params = [], []
+    if start is not None:
+        clauses.append(f"{time_column} >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append(f"{time_column} < ?")
+        params.append(end)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def iter_chunks(conn, table="log", start=None, end=None, chunk_size=10000):
+    """Yields lists of up to chunk_size rows, ordered by time."""
+    name, time_column, columns, _ = EXPORT_TABLES[table]
+    where, params = _where(time_column, start, end)
+    cursor = conn.execute(
+        f"SELECT {', '.join(columns)} FROM {name}{where} ORDER BY {time_column}",
+        params,
+    )
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield rows
+
+
+def _write_csv(stream, columns, chunks):
+    writer = csv.writer(stream)
+    writer.writerow(columns)
+    count = 0
+    for rows in chunks:
+        writer.writerows(rows)
+        count += len(rows)
+    return count
+
+
+def _write_jsonl(stream, columns, chunks):
+    count = 0
+    for rows in chunks:
+        stream.writelines(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+        count += len(rows)
+    return count
+
+
+def _write_npz(path, columns, dtypes, total, chunks):
+    """
+    Writes one .npy member per column. Columns are filled chunk by chunk
+    through memory-mapped temporary files, so only one chunk is in memory.
+    """
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as tmp:
+        arrays = [
+            np.lib.format.open_memmap(
+                os.path.join(tmp, f"{column}.npy"), mode="w+", dtype=dtype, shape=(total,)
+            )
+            for column, dtype in zip(columns, dtypes)
+        ]
+        count = 0
+        for rows in chunks:
+            rows = rows[: total - count]  # Rows added after the count are ignored
+            for i, column_values in enumerate(zip(*rows)):
+                arrays[i][count : count + len(rows)] = column_values
+            count += len(rows)
+        for array in arrays:
+            array.flush()
+        del arrays
+
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for column in columns:
+                archive.write(os.path.join(tmp, f"{column}.npy"), f"{column}.npy")
+    return count
+
+
+def export(db_path, out_path, fmt=None, table="log", start=None, end=None, chunk_size=10000):
+    """
+    Exports rows of `table` with time in [start, end) to out_path as CSV,
+    JSON Lines or a columnar .npz file. out_path "-" writes CSV/JSON Lines
+    to stdout. Returns the number of rows written.
+    """
+    if fmt is None:
+        fmt = os.path.splitext(out_path)[1].lstrip(".").lower() or "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    _, time_column, columns, dtypes = EXPORT_TABLES[table]
+
+    # as_uri() escapes "?", "#" and "%" and handles Windows drive paths.
+    uri = pathlib.Path(db_path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        # One read transaction so the row count and the rows come from the
+        # same snapshot while the app keeps writing.
+        conn.execute("BEGIN")
+        if table != "log" and backfill_pending(conn):
+            print(
+                "INFO: The rollups are still being rebuilt from the log; "
+                "use --table log for complete data.",
+                file=sys.stderr,
+            )
+        chunks = iter_chunks(conn, table, start, end, chunk_size)
+        if fmt == "npz":
+            if out_path == "-":
+                raise ValueError("npz export needs an output file")
+            where, params = _where(time_column, start, end)
+            (total,) = conn.execute(
+                f"SELECT COUNT(*) FROM {EXPORT_TABLES[table][0]}{where}", params
+            ).fetchone()
+            return _write_npz(out_path, columns, dtypes, total, chunks)
+
+        write = _write_csv if fmt == "csv" else _write_jsonl
+        if out_path == "-":
+            return write(sys.stdout, columns, chunks)
+        with open(out_path, "w", newline="") as stream:
+            return write(stream, columns, chunks)
+    finally:
+        conn.close()
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m src.statistics_export",
+        description="Export posture history from statistics.db.",
+    )
+    parser.add_argument("output", help="output file, or - for stdout")
+    parser.add_argument(
+        "--format", choices=FORMATS, help="default: taken from the output extension"
+    )
+    parser.add_argument(
+        "--table",
+        choices=sorted(EXPORT_TABLES),
+        default="log",
+        help="raw intervals (log) or a rollup granularity (default: log)",
+    )
+    parser.add_argument(
+        "--from", dest="start", type=_parse_date, help="first day, YYYY-MM-DD"
+    )
+    parser.add_argument(
+        "--to", dest="end", type=_parse_date, help="day after the last, YYYY-MM-DD"
+    )
+    parser.add_argument(
+        "--db",
+        help="statistics database (default: the application's statistics.db)",
+    )
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(app_data_path(), "statistics.db")
+    if not os.path.exists(db_path):
+        parser.error(f"database not found: {db_path}")
+    try:
+        count = export(
+            db_path,
+            args.output,
+            fmt=args.format,
+            table=args.table,
+            start=args.start,
+            end=args.end,
+            chunk_size=args.chunk_size,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Exported {count} rows.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
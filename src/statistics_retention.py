@@ -0,0 +1,123 @@
+"""
+Retention and compaction of statistics.db.
+
+Raw intervals (posture_log) and the minute and hour rollups are deleted once
+they are older than their retention; the daily rollup, which already holds
+every interval's totals, is kept forever. Deletions happen in small batches,
+and the freed pages are returned to the file system with incremental vacuum
+(auto_vacuum=INCREMENTAL), so StatisticsWriter can run both in idle time
+without long write transactions.
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from .statistics_rollup import ROLLUP_TABLES
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Days of data to keep per table, counted from local midnight; 0 keeps all."""
+
+    raw_days: int = 90
+    minute_days: int = 14
+    hour_days: int = 400
+
+
+def cutoff(now: float, days: int) -> float:
+    """Local midnight `days` days before the day of `now`."""
+    day = date.fromtimestamp(now) - timedelta(days=days)
+    return datetime.combine(day, datetime.min.time()).timestamp()
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection):
+    """
+    Requests auto_vacuum=INCREMENTAL. It only takes effect on a new database,
+    and only before its first table and the switch to WAL; an existing file
+    keeps its mode until rebuild() runs.
+    """
+    conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+
+
+def needs_rebuild(conn: sqlite3.Connection) -> bool:
+    (mode,) = conn.execute("PRAGMA auto_vacuum").fetchone()
+    return mode != AUTO_VACUUM_INCREMENTAL
+
+
+def rebuild(conn: sqlite3.Connection):
+    """One full VACUUM that switches an existing file to incremental vacuum."""
+    print("INFO: Compacting the statistics database once for incremental vacuum.")
+    conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+    conn.execute("VACUUM")
+
+
+def _prune_raw(conn: sqlite3.Connection, before: float, limit: int) -> int:
+    return conn.execute(
+        """
+        DELETE FROM posture_log WHERE id IN (
+            SELECT id FROM posture_log
+            WHERE start_timestamp < ? AND end_timestamp <= ? LIMIT ?
+        )
+        """,
+        (before, before, limit),
+    ).rowcount
+
+
+def _prune_rollup(conn: sqlite3.Connection, table: str, before: float, limit: int) -> int:
+    return conn.execute(
+        f"""
+        DELETE FROM {table} WHERE bucket_start IN (
+            SELECT DISTINCT bucket_start FROM {table}
+            WHERE bucket_start < ? ORDER BY bucket_start LIMIT ?
+        )
+        """,
+        (before, limit),
+    ).rowcount
+
+
+def prune_step(
+    conn: sqlite3.Connection, policy: RetentionPolicy, now: float, limit: int = 500
+) -> int:
+    """
+    Deletes up to `limit` expired rows (buckets for the rollups) from the
+    first table that has any, and commits. Returns the number of rows deleted.
+    """
+    targets = (
+        (policy.raw_days, None),
+        (policy.minute_days, ROLLUP_TABLES["minute"]),
+        (policy.hour_days, ROLLUP_TABLES["hour"]),
+    )
+    for days, table in targets:
+        if days <= 0:
+            continue
+        before = cutoff(now, days)
+        if table is None:
+            deleted = _prune_raw(conn, before, limit)
+        else:
+            deleted = _prune_rollup(conn, table, before, limit)
+        conn.commit()
+        if deleted:
+            return deleted
+    return 0
+
+
+def vacuum_step(conn: sqlite3.Connection, pages: int = 64) -> int:
+    """
+    Returns up to `pages` free pages to the file system. Returns the number
+    of pages released; 0 when there is nothing to release.
+    """
+    (mode,) = conn.execute("PRAGMA auto_vacuum").fetchone()
+    if mode != AUTO_VACUUM_INCREMENTAL:
+        return 0
+    (free,) = conn.execute("PRAGMA freelist_count").fetchone()
+    if not free:
+        return 0
+    released = min(free, pages)
+    conn.execute(f"PRAGMA incremental_vacuum({released})").fetchall()
+    conn.commit()
+    if released == free:
+        # The file only shrinks once the WAL is checkpointed.
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+    return released
@@ -0,0 +1,218 @@
+"""
+Time-bucketed rollups of posture_log.
+
+Every logged interval is split at local minute, hour and day boundaries and
+added to one table per granularity, so summaries over any range read a
+handful of pre-aggregated rows instead of scanning posture_log.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+ROLLUP_TABLES = {
+    "minute": "posture_rollup_minute",
+    "hour": "posture_rollup_hour",
+    "day": "posture_rollup_day",
+}
+# Coarsest first: summaries use whole days, then hours, then minutes.
+_UNITS = ("day", "hour", "minute")
+_STEPS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# Bumped whenever the schema below changes; stored in PRAGMA user_version.
+SCHEMA_VERSION = 1
+
+
+def floor_bucket(ts: float, unit: str) -> float:
+    """Start of the local-time bucket that contains ts."""
+    dt = datetime.fromtimestamp(ts)
+    if unit == "minute":
+        dt = dt.replace(second=0, microsecond=0)
+    elif unit == "hour":
+        dt = dt.replace(minute=0, second=0, microsecond=0)
+    else:
+        dt = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    return dt.timestamp()
+
+
+def next_bucket(bucket_start: float, unit: str) -> float:
+    return (datetime.fromtimestamp(bucket_start) + _STEPS[unit]).timestamp()
+
+
+def ceil_bucket(ts: float, unit: str) -> float:
+    start = floor_bucket(ts, unit)
+    return start if start == ts else next_bucket(start, unit)
+
+
+def split_interval(start: float, end: float, unit: str):
+    """Yields (bucket_start, seconds) for the part of [start, end) in each bucket."""
+    bucket = floor_bucket(start, unit)
+    while start < end:
+        bucket_end = next_bucket(bucket, unit)
+        part_end = min(end, bucket_end)
+        yield bucket, part_end - start
+        start = part_end
+        bucket = bucket_end
+
+
+def create_tables(conn: sqlite3.Connection):
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_posture_log_start ON posture_log (start_timestamp)"
+    )
+    for table in ROLLUP_TABLES.values():
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket_start REAL NOT NULL,
+                state TEXT NOT NULL,
+                duration_seconds REAL NOT NULL,
+                PRIMARY KEY (bucket_start, state)
+            ) WITHOUT ROWID
+        """
+        )
+
+
+def add_interval(conn: sqlite3.Connection, start: float, end: float, state: str):
+    """Adds one interval to every rollup table. The caller commits."""
+    for unit, table in ROLLUP_TABLES.items():
+        conn.executemany(
+            f"""
+            INSERT INTO {table} (bucket_start, state, duration_seconds) VALUES (?, ?, ?)
+            ON CONFLICT (bucket_start, state)
+            DO UPDATE SET duration_seconds = duration_seconds + excluded.duration_seconds
+            """,
+            [(bucket, state, seconds) for bucket, seconds in split_interval(start, end, unit)],
+        )
+
+
+# Progress of the one-time rebuild from posture_log: rows with
+# next_id < id <= end_id are not in the rollups yet.
+BACKFILL_TABLE = "posture_rollup_backfill"
+
+
+def migrate(conn: sqlite3.Connection):
+    """
+    Creates the rollup tables. On first run the rebuild from posture_log is
+    only scheduled; StatisticsWriter runs it with backfill_step().
+    """
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+    create_tables(conn)
+    if version < 1 and not backfill_pending(conn):
+        (last_id,) = conn.execute("SELECT MAX(id) FROM posture_log").fetchone()
+        if last_id is None:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        else:
+            for table in ROLLUP_TABLES.values():
+                conn.execute(f"DELETE FROM {table}")
+            # Rows logged from now on are added to the rollups as they are
+            # written, so only the ones up to last_id need the rebuild.
+            conn.execute(f"CREATE TABLE {BACKFILL_TABLE} (next_id INTEGER, end_id INTEGER)")
+            conn.execute(f"INSERT INTO {BACKFILL_TABLE} VALUES (0, ?)", (last_id,))
+    conn.commit()
+
+
+def backfill_pending(conn: sqlite3.Connection) -> bool:
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (BACKFILL_TABLE,),
+        ).fetchone()
+        is not None
+    )
+
+
+def backfill_step(conn: sqlite3.Connection, limit: int = 1000) -> int:
+    """
+    Adds the next `limit` posture_log rows of the rebuild to the rollups and
+    commits. Returns the number of rows added; 0 once the rebuild is done.
+    """
+    if not backfill_pending(conn):
+        return 0
+    next_id, end_id = conn.execute(f"SELECT next_id, end_id FROM {BACKFILL_TABLE}").fetchone()
+    rows = conn.execute(
+        "SELECT id, start_timestamp, end_timestamp, state FROM posture_log "
+        "WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+        (next_id, end_id, limit),
+    ).fetchall()
+    for _id, start, end, state in rows:
+        add_interval(conn, start, end, state)
+    if rows:
+        conn.execute(f"UPDATE {BACKFILL_TABLE} SET next_id = ?", (rows[-1][0],))
+    else:
+        conn.execute(f"DROP TABLE {BACKFILL_TABLE}")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        print("INFO: Statistics rollups rebuilt.")
+    conn.commit()
+    return len(rows)
+
+
+def _ranges(start: float, end: float, units=_UNITS, available_from=None):
+    """
+    Decomposes [start, end) into (unit, lo, hi) bucket ranges, coarsest first.
+    `available_from` maps a unit to its earliest bucket still stored; a range
+    starting before that is answered from the coarser unit instead.
+    """
+    unit, finer = units[0], units[1:]
+    if not finer or start < (available_from or {}).get(finer[0], start):
+        # Finest level, or the finer buckets were pruned by retention:
+        # a partially covered first bucket is counted whole.
+        yield unit, floor_bucket(start, unit), end
+        return
+    lo = ceil_bucket(start, unit)
+    hi = floor_bucket(end, unit)
+    if lo >= hi:
+        yield from _ranges(start, end, finer, available_from)
+        return
+    yield unit, lo, hi
+    if start < lo:
+        yield from _ranges(start, lo, finer, available_from)
+    if hi < end:
+        yield from _ranges(hi, end, finer, available_from)
+
+
+def _available_from(conn: sqlite3.Connection) -> dict:
+    """Earliest bucket per prunable unit; an empty table has none."""
+    available = {}
+    for unit in ("hour", "minute"):
+        (earliest,) = conn.execute(
+            f"SELECT MIN(bucket_start) FROM {ROLLUP_TABLES[unit]}"
+        ).fetchone()
+        available[unit] = float("inf") if earliest is None else earliest
+    return available
+
+
+def summarize(conn: sqlite3.Connection, start: float, end: float) -> dict:
+    """
+    Total seconds per state in [start, end), read from the rollup tables.
+    Where the minute or hour rollups were pruned (statistics_retention), the
+    edges are rounded out to whole hours or days. Until the first-run rebuild
+    is done, posture_log is summed instead.
+    """
+    totals = {}
+    if end <= start:
+        return totals
+    if backfill_pending(conn):
+        return _summarize_log(conn, start, end)
+    for unit, lo, hi in _ranges(start, end, available_from=_available_from(conn)):
+        cursor = conn.execute(
+            f"SELECT state, SUM(duration_seconds) FROM {ROLLUP_TABLES[unit]} "
+            "WHERE bucket_start >= ? AND bucket_start < ? GROUP BY state",
+            (lo, hi),
+        )
+        for state, seconds in cursor:
+            totals[state] = totals.get(state, 0) + (seconds or 0)
+    return totals
+
+
+def _summarize_log(conn: sqlite3.Connection, start: float, end: float) -> dict:
+    """Total seconds per state in [start, end), clipped from posture_log."""
+    cursor = conn.execute(
+        "SELECT state, SUM(MIN(end_timestamp, ?) - MAX(start_timestamp, ?)) "
+        "FROM posture_log WHERE start_timestamp < ? AND end_timestamp > ? "
+        "GROUP BY state",
+        (end, start, end, start),
+    )
+    return {state: seconds or 0 for state, seconds in cursor}
@@ -1,22 +1,43 @@
 import os
 import sqlite3
+import threading
 import time
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from PyQt6.QtCore import QObject, pyqtSignal
+from . import statistics_retention, statistics_rollup
+from .day_accumulator import DayAccumulator
 from .processing_service import PostureStatus
-from PyQt6.QtCore import QStandardPaths
+from .statistics_writer import StatisticsWriter
+from .utils import app_data_path
 
 
-class StatisticsService:
-    def __init__(self, db_path="statistics.db"):
-        app_data_path = QStandardPaths.writableLocation(
-            QStandardPaths.StandardLocation.AppDataLocation
-        )
-        os.makedirs(app_data_path, exist_ok=True)
-        db_path = os.path.join(app_data_path, db_path)
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+class StatisticsService(QObject):
+    # state name, start and end timestamp of every interval written to the log
+    interval_logged = pyqtSignal(str, float, float)
+
+    def __init__(self, db_path="statistics.db", retention=None, parent=None):
+        super().__init__(parent)
+        self.db_path = os.path.join(app_data_path(), db_path)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # Must precede WAL and the first table; older files are converted
+        # later by the writer, in idle time.
+        statistics_retention.enable_incremental_vacuum(self.conn)
+        self.conn.execute("PRAGMA journal_mode=WAL")
         self._create_table()
+        # Inserts are committed in batches on a background thread, which
+        # also applies the retention policy when idle; this connection is
+        # only used for reads.
+        self.writer = StatisticsWriter(self.db_path, retention=retention)
+        self.writer.start()
         self.current_status = PostureStatus.NOT_DETECTED
         self.last_status_change_time = time.time()
+        # Today's totals are kept in memory, seeded once from the database,
+        # so get_summary_for_today() needs no query.
+        self._lock = threading.Lock()
+        today = date.today()
+        self._today = DayAccumulator(
+            today, self._get_summary_for_days(today, today + timedelta(days=1))
+        )
 
     def _create_table(self):
         cursor = self.conn.cursor()
@@ -32,6 +53,11 @@ class StatisticsService:
         """
         )
         self.conn.commit()
+        statistics_rollup.migrate(self.conn)
+
+    def set_retention(self, retention):
+        """Replaces the RetentionPolicy; None stops pruning and compaction."""
+        self.writer.retention = retention
 
     def handle_status_update(self, new_status: PostureStatus):
         now = time.time()
@@ -47,32 +73,59 @@ class StatisticsService:
                 )
 
             # Reset for the new state
-            self.current_status = new_status
-            self.last_status_change_time = now
+            with self._lock:
+                self.current_status = new_status
+                self.last_status_change_time = now
 
     def _log_entry(self, start, end, duration, state):
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "INSERT INTO posture_log (start_timestamp, end_timestamp, duration_seconds, state) VALUES (?, ?, ?, ?)",
-            (start, end, duration, state),
-        )
-        self.conn.commit()
+        self.writer.submit(start, end, duration, state)
+        with self._lock:
+            self._today.add(state, start, end)
+        self.interval_logged.emit(state, start, end)
+
+    def get_summary(self, start: float, end: float):
+        """Seconds spent in each state between two timestamps, from the rollup tables."""
+        self.writer.flush()  # Make queued intervals visible to this connection
+        totals = statistics_rollup.summarize(self.conn, start, end)
+        return {
+            "CORRECT": totals.get("CORRECT", 0),
+            "INCORRECT": totals.get("INCORRECT", 0),
+        }
 
     def get_summary_for_today(self):
-        today_start = datetime.combine(date.today(), datetime.min.time()).timestamp()
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT state, SUM(duration_seconds) FROM posture_log WHERE start_timestamp >= ? GROUP BY state",
-            (today_start,),
-        )
-        summary = {"CORRECT": 0, "INCORRECT": 0}
-        for row in cursor.fetchall():
-            state, total_duration = row
-            if state in summary:
-                summary[state] = total_duration if total_duration else 0
-        return summary
+        """
+        Seconds in each state since midnight, including the current state so
+        far. Served from memory; safe to call from any thread.
+        """
+        with self._lock:
+            open_state = None
+            if self.current_status in (PostureStatus.CORRECT, PostureStatus.INCORRECT):
+                open_state = self.current_status.name
+            totals = self._today.snapshot(
+                time.time(), open_state, self.last_status_change_time
+            )
+        return {
+            "CORRECT": totals.get("CORRECT", 0),
+            "INCORRECT": totals.get("INCORRECT", 0),
+        }
+
+    def get_summary_for_week(self):
+        week_start = date.today() - timedelta(days=date.today().weekday())
+        return self._get_summary_for_days(week_start, week_start + timedelta(days=7))
+
+    def get_summary_for_month(self):
+        month_start = date.today().replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        return self._get_summary_for_days(month_start, next_month)
+
+    def _get_summary_for_days(self, first_day: date, end_day: date):
+        # Whole-day ranges are answered from one posture_rollup_day row per day.
+        start = datetime.combine(first_day, datetime.min.time()).timestamp()
+        end = datetime.combine(end_day, datetime.min.time()).timestamp()
+        return self.get_summary(start, end)
 
     def close(self):
         # Log the final session before closing
         self.handle_status_update(PostureStatus.NOT_DETECTED)
+        self.writer.close()
         self.conn.close()
@@ -1,82 +1,122 @@
-from PyQt6.QtWidgets import (
-    QDialog,
-    QVBoxLayout,
-    QLabel,
-    QSizePolicy,
+from PyQt6.QtCore import QRectF, Qt, QTimer
+from PyQt6.QtGui import QColor, QPainter
+from PyQt6.QtWidgets import QDialog, QLabel, QSizePolicy, QVBoxLayout, QWidget
+
+SLICES = (
+    ("CORRECT", "Correct", QColor("green")),
+    ("INCORRECT", "Incorrect", QColor("red")),
 )
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
 
 
-# Add this class to src/statistics_window.py
-class MplCanvas(FigureCanvas):
-    """A custom Matplotlib canvas widget to embed in PyQt."""
+class PieChart(QWidget):
+    """Pie chart of the time spent in each state, painted with QPainter."""
 
-    def __init__(self, parent=None, width=5, height=4, dpi=100):
-        self.figure = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = self.figure.add_subplot(111)
-        super().__init__(self.figure)
-        self.setParent(parent)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.totals = {}
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        self.updateGeometry()
+        self.setMinimumSize(300, 250)
+
+    def set_totals(self, totals: dict):
+        self.totals = dict(totals)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        total = sum(self.totals.get(state, 0) for state, _, _ in SLICES)
+        if total <= 0:
+            painter.drawText(
+                self.rect(), Qt.AlignmentFlag.AlignCenter, "No data for today yet."
+            )
+            return
+
+        side = min(self.width(), self.height()) * 0.7
+        pie = QRectF((self.width() - side) / 2, (self.height() - side) / 2, side, side)
+        painter.setPen(Qt.PenStyle.NoPen)
+        # Angles are in 1/16 degree, counter-clockwise from 3 o'clock; start
+        # at 12 o'clock and go clockwise.
+        done = 0
+        for state, label, color in SLICES:
+            seconds = self.totals.get(state, 0)
+            if seconds <= 0:
+                continue
+            # Rounded from the running sum so the slices always close the circle.
+            start = 90 * 16 - round(360 * 16 * done / total)
+            done += seconds
+            end = 90 * 16 - round(360 * 16 * done / total)
+            painter.setBrush(color)
+            painter.drawPie(pie, start, end - start)
+
+        painter.setPen(self.palette().windowText().color())
+        metrics = painter.fontMetrics()
+        legend_y = pie.bottom() + metrics.height() + 4
+        legend = "    ".join(
+            f"{label}: {100 * self.totals.get(state, 0) / total:.1f}%"
+            for state, label, _ in SLICES
+            if self.totals.get(state, 0) > 0
+        )
+        painter.drawText(
+            QRectF(0, legend_y - metrics.ascent(), self.width(), metrics.height()),
+            Qt.AlignmentFlag.AlignHCenter,
+            legend,
+        )
 
 
 class StatisticsWindow(QDialog):
+    """
+    Today's posture statistics. The window is created once and kept; while
+    it is shown it re-reads the statistics service's in-memory day totals
+    every second (including the current state so far) and whenever an
+    interval is logged. Hidden, it does no work.
+    """
+
+    REFRESH_MS = 1000
+
     def __init__(self, stats_service, parent=None):
         super().__init__(parent)
         self.stats_service = stats_service
         self.setWindowTitle("Today's Statistics")
         self.setMinimumSize(500, 400)
+        self._connected = False
 
         layout = QVBoxLayout(self)
-        self.canvas = MplCanvas(self, width=5, height=4, dpi=100)
-        layout.addWidget(self.canvas)
+        self.chart = PieChart(self)
+        layout.addWidget(self.chart)
 
         self.summary_label = QLabel("Loading...")
         layout.addWidget(self.summary_label)
 
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.update_stats)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._connected:
+            self.stats_service.interval_logged.connect(self.on_interval_logged)
+            self._connected = True
+        self.refresh_timer.start(self.REFRESH_MS)
         self.update_stats()
 
-        self.setLayout(layout)
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+        if self._connected:
+            self.stats_service.interval_logged.disconnect(self.on_interval_logged)
+            self._connected = False
+
+    def on_interval_logged(self, state: str, start: float, end: float):
+        self.update_stats()
 
     def update_stats(self):
-        summary = self.stats_service.get_summary_for_today()
-        correct_s = summary.get("CORRECT", 0)
-        incorrect_s = summary.get("INCORRECT", 0)
-
-        labels = []
-        sizes = []
-        colors = []
-
-        if correct_s > 0:
-            labels.append("Correct")
-            sizes.append(correct_s)
-            colors.append("green")
-        if incorrect_s > 0:
-            labels.append("Incorrect")
-            sizes.append(incorrect_s)
-            colors.append("red")
-
-        self.canvas.axes.clear()
-        if not sizes:
-            self.canvas.axes.text(
-                0.5, 0.5, "No data for today yet.", ha="center", va="center"
-            )
+        totals = self.stats_service.get_summary_for_today()
+        self.chart.set_totals(totals)
+        correct_s = totals.get("CORRECT", 0)
+        incorrect_s = totals.get("INCORRECT", 0)
+        if correct_s <= 0 and incorrect_s <= 0:
             self.summary_label.setText("Track your posture to see statistics here.")
-        else:
-            self.canvas.axes.pie(
-                sizes, labels=labels, autopct="%1.1f%%", startangle=90, colors=colors
-            )
-            self.canvas.axes.axis(
-                "equal"
-            )  # Equal aspect ratio ensures that pie is drawn as a circle.
-
-            correct_m = correct_s / 60
-            incorrect_m = incorrect_s / 60
-            self.summary_label.setText(
-                f"Time with Correct Posture: {correct_m:.1f} minutes\n"
-                f"Time with Incorrect Posture: {incorrect_m:.1f} minutes"
-            )
-
-        self.canvas.draw()
+            return
+        self.summary_label.setText(
+            f"Time with Correct Posture: {correct_s / 60:.1f} minutes\n"
+            f"Time with Incorrect Posture: {incorrect_s / 60:.1f} minutes"
+        )
@@ -0,0 +1,162 @@
+import queue
+import sqlite3
+import threading
+import time
+from . import statistics_retention, statistics_rollup
+
+_STOP = object()
+
+
+class StatisticsWriter(threading.Thread):
+    """
+    Write-behind writer for posture intervals.
+
+    Owns its own SQLite connection on a dedicated thread. Submitted intervals
+    are queued and committed together once `batch_size` records are pending
+    or `flush_interval` seconds after the first pending record, whichever
+    comes first, so a burst of status changes costs one commit instead of
+    one per interval.
+
+    A rollup rebuild scheduled by statistics_rollup.migrate() runs first, in
+    chunks between writes. With a RetentionPolicy, the writer also prunes
+    expired rows and releases free pages (see statistics_retention) one
+    small step at a time, only after `idle_delay` seconds without writes.
+    Once nothing is left to do it checks again every `maintenance_interval`
+    seconds.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 32,
+        flush_interval: float = 5.0,
+        retention: statistics_retention.RetentionPolicy = None,
+        idle_delay: float = 2.0,
+        maintenance_interval: float = 3600.0,
+    ):
+        super().__init__(name="StatisticsWriter", daemon=True)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # May be replaced at any time; read before every maintenance step.
+        self.retention = retention
+        self.idle_delay = idle_delay
+        self.maintenance_interval = maintenance_interval
+        self._queue = queue.Queue()
+
+    def submit(self, start: float, end: float, duration: float, state: str):
+        self._queue.put((start, end, duration, state))
+
+    def flush(self, timeout: float = None) -> bool:
+        """Blocks until everything submitted so far is committed."""
+        if not self.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Commits pending records and stops the thread."""
+        if self.is_alive():
+            self._queue.put(_STOP)
+            self.join()
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path)
+        # WAL keeps readers on other connections unblocked during commits,
+        # and NORMAL sync is safe in WAL mode (no fsync per transaction).
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        pending = []
+        deadline = None
+        next_maintenance = time.monotonic() + self.idle_delay
+        backfilling = statistics_rollup.backfill_pending(conn)
+        try:
+            while True:
+                timeout = None
+                if pending:
+                    timeout = max(0.0, deadline - time.monotonic())
+                elif backfilling:
+                    timeout = 0.0
+                elif self.retention is not None:
+                    timeout = max(0.0, next_maintenance - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    if pending:
+                        self._commit(conn, pending)
+                    elif backfilling:
+                        # Before any pruning, which would lose unrolled rows.
+                        backfilling = self._backfill(conn)
+                    else:
+                        busy = self._maintain(conn)
+                        next_maintenance = time.monotonic() + (
+                            self.idle_delay if busy else self.maintenance_interval
+                        )
+                    continue
+
+                # Maintenance waits for the writes to go quiet.
+                next_maintenance = max(
+                    next_maintenance, time.monotonic() + self.idle_delay
+                )
+
+                if item is _STOP:
+                    self._commit(conn, pending)
+                    break
+                if isinstance(item, threading.Event):
+                    self._commit(conn, pending)
+                    item.set()
+                    continue
+
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending.append(item)
+                if len(pending) >= self.batch_size:
+                    self._commit(conn, pending)
+        finally:
+            conn.close()
+
+    def _backfill(self, conn: sqlite3.Connection) -> bool:
+        """One chunk of the rollup rebuild. Returns True while it is not done."""
+        try:
+            return statistics_rollup.backfill_step(conn) > 0
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"ERROR: Could not rebuild statistics rollups ({e}).")
+            return False
+
+    def _maintain(self, conn: sqlite3.Connection) -> bool:
+        """One small retention or vacuum step. Returns True if there was work."""
+        retention = self.retention
+        if retention is None or statistics_rollup.backfill_pending(conn):
+            # Pruning posture_log now would lose rows not yet rolled up.
+            return False
+        try:
+            if statistics_retention.needs_rebuild(conn):
+                # Once per existing database, on this thread rather than
+                # at startup; queued intervals wait until it is done.
+                statistics_retention.rebuild(conn)
+                return True
+            if statistics_retention.prune_step(conn, retention, time.time()):
+                return True
+            return statistics_retention.vacuum_step(conn) > 0
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"ERROR: Could not compact statistics ({e}).")
+            return False
+
+    def _commit(self, conn: sqlite3.Connection, pending: list):
+        if not pending:
+            return
+        try:
+            conn.executemany(
+                "INSERT INTO posture_log (start_timestamp, end_timestamp, duration_seconds, state) VALUES (?, ?, ?, ?)",
+                pending,
+            )
+            for start, end, _duration, state in pending:
+                statistics_rollup.add_interval(conn, start, end, state)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"ERROR: Could not write statistics ({e}).")
+        pending.clear()
@@ -0,0 +1,49 @@
+import threading
+from PyQt6.QtCore import QObject, pyqtSignal
+from .posture_status import PostureStatus
+
+
+def fuse_statuses(statuses) -> PostureStatus:
+    """
+    One posture status from several cameras' statuses. Cameras that do not
+    see the user are ignored; among the others, a single INCORRECT wins,
+    since each camera is calibrated and debounced on its own.
+    """
+    statuses = set(statuses)
+    if PostureStatus.INCORRECT in statuses:
+        return PostureStatus.INCORRECT
+    if PostureStatus.CORRECT in statuses:
+        return PostureStatus.CORRECT
+    return PostureStatus.NOT_DETECTED
+
+
+class StatusFuser(QObject):
+    """
+    Combines the confirmed statuses of several ProcessingServices into one
+    stream. Every update from any camera, heartbeats included, emits the
+    fused status; with a single camera it passes statuses through unchanged.
+    """
+
+    status_updated = pyqtSignal(PostureStatus)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Updates may arrive on the cameras' analysis threads.
+        self._lock = threading.Lock()
+        self._statuses = {}  # source key -> last confirmed status
+
+    def update(self, key, status: PostureStatus):
+        # Emitted under the lock so that fused statuses computed on
+        # different threads reach the receivers in the order computed.
+        with self._lock:
+            self._statuses[key] = status
+            self.status_updated.emit(fuse_statuses(self._statuses.values()))
+
+    def forget(self, key):
+        """Drops a camera that stopped, e.g. one that was unplugged."""
+        with self._lock:
+            self._statuses.pop(key, None)
+
+    def reset(self):
+        with self._lock:
+            self._statuses.clear()
@@ -0,0 +1,66 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QBrush, QColor, QGuiApplication, QIcon, QPainter, QPixmap
+
+
+class TrayIconCache:
+    """
+    Builds each tray icon variant (base icon plus an optional status dot)
+    once, at the usual tray sizes for every screen's device pixel ratio,
+    and hands out the cached QIcon afterwards.
+    """
+
+    SIZES = (16, 22, 24, 32, 48, 64)
+
+    def __init__(self, icon_path: str):
+        self.icon_path = icon_path
+        self._base_pixmap = None
+        self._icons = {}
+
+    def icon(self, dot_color: str = None) -> QIcon:
+        """Returns the icon with a dot of the given color name, or the plain icon."""
+        icon = self._icons.get(dot_color)
+        if icon is None:
+            icon = self._build(dot_color)
+            self._icons[dot_color] = icon
+        return icon
+
+    def clear(self):
+        """Drops cached variants, e.g. after the set of screens changed."""
+        self._icons.clear()
+
+    def _build(self, dot_color: str) -> QIcon:
+        if self._base_pixmap is None:
+            self._base_pixmap = QPixmap(self.icon_path)
+        icon = QIcon()
+        if self._base_pixmap.isNull():
+            return icon
+
+        ratios = {1.0}
+        for screen in QGuiApplication.screens():
+            ratios.add(screen.devicePixelRatio())
+        for ratio in sorted(ratios):
+            for size in self.SIZES:
+                icon.addPixmap(self._render(dot_color, round(size * ratio), ratio))
+        return icon
+
+    def _render(self, dot_color: str, pixel_size: int, ratio: float) -> QPixmap:
+        pixmap = self._base_pixmap.scaled(
+            pixel_size,
+            pixel_size,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation,
+        )
+        if dot_color:
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            radius = max(2, pixmap.width() // 8)
+            margin = max(1, pixmap.width() // 8)
+            x = pixmap.width() - (2 * radius) - margin
+            y = pixmap.height() - (2 * radius) - margin
+
+            painter.setBrush(QBrush(QColor(dot_color)))
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.drawEllipse(x, y, 3 * radius, 3 * radius)
+            painter.end()
+        pixmap.setDevicePixelRatio(ratio)
+        return pixmap
@@ -1,6 +1,9 @@
 import sys
 import os
 
+ORGANIZATION_NAME = "SergTheEngineer"
+APPLICATION_NAME = "PostureAssistant"
+
 
 def resource_path(relative_path):
     """Get absolute path to resource, works for dev and for PyInstaller"""
@@ -11,3 +14,18 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
 
     return os.path.join(base_path, relative_path)
+
+
+def app_data_path():
+    """Per-user data directory (settings, statistics), created if missing."""
+    from PyQt6.QtCore import QCoreApplication, QStandardPaths
+
+    # Command-line tools run without the GUI's QApplication setup.
+    if not QCoreApplication.applicationName() or not QCoreApplication.organizationName():
+        QCoreApplication.setOrganizationName(ORGANIZATION_NAME)
+        QCoreApplication.setApplicationName(APPLICATION_NAME)
+    path = QStandardPaths.writableLocation(
+        QStandardPaths.StandardLocation.AppDataLocation
+    )
+    os.makedirs(path, exist_ok=True)
+    return path